@@ -2,22 +2,30 @@ import argparse
 import asyncio
 import json
 import os
+import random
 import uuid
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from src.agentsim.registry import (
-    load_agents, save_agents, add_agent, remove_agent, upsert_agent, find_by_name,
-    set_agents_path
+from src.agentsim import jsonio
+from src.agentsim.registry import set_agents_path
+from src.agentsim.registry_cache import (
+    load_agents, save_agents, add_agent, remove_agent, upsert_agent, find_by_name
 )
 from src.agentsim.persona_gen import (
-    generate_persona_default, generate_personas_diverse, generate_personas_for_environment,
+    generate_persona_default, generate_personas_for_environment,
     GENDER_OPTIONS, EDU_OPTIONS, INCOME_OPTIONS, OCCUPATION_SAMPLES
 )
-from src.agentsim.logger import init_agent_log, set_log_root
+from src.agentsim.logger import init_agent_log, init_agent_logs_batch, set_log_root
+from src.agentsim.llm import run_with_llm
 
 load_dotenv()
 
+# add-batch 的 LLM 并发上限（可被 --concurrency 覆盖）
+DEFAULT_CONCURRENCY = int(os.getenv("AGENTSIM_LLM_CONCURRENCY", "8"))
+# 每个并发任务的年龄种子区间，配合职业种子让各条 prompt 互不相同
+_AGE_BUCKETS = [(18, 25), (26, 40), (41, 60), (61, 75)]
+
 def _print_table(items: List[Dict[str, Any]]):
     if not items:
         print("(空)")
@@ -31,10 +39,14 @@ def _print_table(items: List[Dict[str, Any]]):
         print(" | ".join(str(it.get(c, "")).ljust(widths[c]) for c in cols))
 
 def _json_or_file(val: str) -> Any:
-    if os.path.exists(val):
-        with open(val, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return json.loads(val)
+    # 直接尝试按路径打开（省去 exists 检查的额外 stat），打不开则视为 JSON 字符串；
+    # 含 NUL 字符的字符串不是合法路径，open 会抛 ValueError，同样按 JSON 处理
+    try:
+        with open(val, "rb") as f:
+            raw = f.read()
+    except (OSError, ValueError):
+        return jsonio.loads(val)
+    return jsonio.loads(raw)
 
 def _maybe_bind_experiment(exp_dir: str):
     """如果指定了实验目录，则切换该实验的 agents.json 与日志根目录。"""
@@ -50,8 +62,7 @@ def cmd_list(args):
 def cmd_show(args):
     if args.experiment:
         _maybe_bind_experiment(args.experiment)
-    items = load_agents()
-    it = find_by_name(items, args.name)
+    it = find_by_name(args.name)
     if not it:
         print(f"未找到：{args.name}")
         return
@@ -95,6 +106,28 @@ async def _create_or_update_persona(args, is_update: bool):
 
     init_agent_log(persona["name"], {"type": "init", "agent": persona})
 
+async def _gen_many(n: int, diversity_hint: Optional[str], concurrency: int) -> List[Dict[str, Any]]:
+    """并发生成 n 个 persona：每个任务带不同的职业/年龄种子，由 Semaphore 限制同时在途的 LLM 请求数。"""
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def _bounded(**seed):
+        async with sem:
+            return await generate_persona_default(diversity_hint=diversity_hint, **seed)
+
+    tasks = [
+        asyncio.create_task(_bounded(
+            occupation=random.choice(OCCUPATION_SAMPLES),
+            age=random.randint(*random.choice(_AGE_BUCKETS)),
+        ))
+        for _ in range(n)
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    personas = [r for r in results if isinstance(r, dict)]
+    failed = len(results) - len(personas)
+    if failed:
+        print(f"警告：{failed} 个 persona 生成失败，已跳过")
+    return personas
+
 async def cmd_add_batch(args):
     if args.experiment:
         _maybe_bind_experiment(args.experiment)
@@ -109,20 +142,24 @@ async def cmd_add_batch(args):
             env = {"title": "生成自提示的环境", "prompt": args.env_hint, "rules": []}
         personas = await generate_personas_for_environment(args.count, env, args.diversity_hint)
     else:
-        personas = await generate_personas_diverse(args.count, args.diversity_hint)
+        personas = await _gen_many(args.count, args.diversity_hint, args.concurrency)
 
     items = load_agents()
     existing_names = {it.get("name") for it in items}
+    # 每个重名基础名下一次从哪个后缀开始尝试，避免每次冲突都从 2 重新探测
+    next_suffix: Dict[str, int] = {}
 
     added = 0
+    init_entries: List[Tuple[str, Dict[str, Any]]] = []
     for p in personas:
         nm = p["name"]
         if nm in existing_names:
-            suffix = 2
+            suffix = next_suffix.get(nm, 2)
             new_nm = f"{nm}{suffix}"
             while new_nm in existing_names:
                 suffix += 1
                 new_nm = f"{nm}{suffix}"
+            next_suffix[nm] = suffix + 1
             p["name"] = new_nm
             nm = new_nm
 
@@ -132,9 +169,10 @@ async def cmd_add_batch(args):
         items.append(p)
         existing_names.add(nm)
         added += 1
-        init_agent_log(nm, {"type": "init", "agent": p})
+        init_entries.append((nm, {"type": "init", "agent": p}))
 
     save_agents(items)
+    init_agent_logs_batch(init_entries)
     print(f"批量新增完成：生成 {added} 个；当前总数 = {len(items)}")
 
 def cmd_remove(args):
@@ -151,21 +189,29 @@ def cmd_bulk_import(args):
         raise SystemExit("导入数据需为数组（列表）")
     items = load_agents()
     existing_names = {it.get("name") for it in items}
-    added = 0
+
+    # 第一遍：过滤无名/重名记录（导入数据内部重名时保留第一条）
+    valid: List[Dict[str, Any]] = []
     for it in data:
         nm = it.get("name")
         if not nm or nm in existing_names:
             continue
-        it.setdefault("id", f"agent_{uuid.uuid4().hex}")
+        existing_names.add(nm)
+        valid.append(it)
+
+    # 第二遍：一次性取足随机字节作为缺失的 id，并补全默认字段
+    raw_ids = os.urandom(16 * len(valid)).hex()
+    for i, it in enumerate(valid):
+        if "id" not in it:
+            it["id"] = f"agent_{raw_ids[32 * i:32 * (i + 1)]}"
         it.setdefault("initial_state", {"location": "起点", "mood": "calm"})
         it.setdefault("initial_memory", ["对周边较熟悉", "注重安全", "愿意与人合作"])
         it.setdefault("relations", {})
-        items.append(it)
-        existing_names.add(nm)
-        added += 1
-        init_agent_log(nm, {"type": "init", "agent": it})
+
+    items.extend(valid)
     save_agents(items)
-    print(f"导入完成，新增 {added} 条；现有总数 {len(items)}")
+    init_agent_logs_batch([(it["name"], {"type": "init", "agent": it}) for it in valid])
+    print(f"导入完成，新增 {len(valid)} 条；现有总数 {len(items)}")
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(description="Agents Registry CLI（支持按实验隔离）")
@@ -199,6 +245,7 @@ def build_parser() -> argparse.ArgumentParser:
     s.add_argument("--diversity-hint", type=str, default=None)
     s.add_argument("--env-hint", type=str, default=None)
     s.add_argument("--env-spec-json", type=str, default=None)
+    s.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="无环境时并发生成的 LLM 请求上限")
     s.set_defaults(async_func=cmd_add_batch)
 
     s = sub.add_parser("remove", help="按姓名删除"); add_exp_arg(s)
@@ -214,7 +261,7 @@ def main():
     parser = build_parser()
     args = parser.parse_args()
     if hasattr(args, "async_func"):
-        asyncio.run(args.async_func(args))
+        run_with_llm(args.async_func(args))
     else:
         args.func(args)
 
@@ -8,15 +8,56 @@
 """
 
 import numpy as np
-from typing import Dict, List, Tuple, Any, Optional
+from collections import deque
+from typing import Deque, Dict, Tuple, Any, Optional
 from dataclasses import dataclass, field
-from datetime import datetime
-import json
+import time
 
+from . import jsonio
 
-@dataclass
+
+# 关系维度顺序：components 向量中各分量的含义
+RELATION_COMPONENTS = ("trust", "respect", "affection", "dependency")
+
+# 不同互动类型对各维度的影响
+_RAW_INTERACTION_EFFECTS = {
+    "cooperation": {"trust": 0.8, "respect": 0.6, "affection": 0.4, "dependency": 0.2},
+    "conflict": {"trust": -0.7, "respect": -0.5, "affection": -0.8, "dependency": 0.0},
+    "help": {"trust": 0.6, "respect": 0.4, "affection": 0.7, "dependency": 0.5},
+    "betrayal": {"trust": -1.0, "respect": -0.6, "affection": -0.9, "dependency": -0.3},
+    "praise": {"respect": 0.7, "affection": 0.5, "trust": 0.3, "dependency": 0.0},
+    "criticism": {"respect": -0.4, "affection": -0.3, "trust": -0.2, "dependency": 0.0},
+    "support": {"trust": 0.5, "affection": 0.6, "respect": 0.4, "dependency": 0.3},
+    "rejection": {"affection": -0.8, "trust": -0.4, "respect": -0.3, "dependency": -0.2},
+    "competition": {"respect": 0.3, "trust": -0.2, "affection": -0.1, "dependency": 0.0},
+    "alliance": {"trust": 0.7, "dependency": 0.6, "respect": 0.5, "affection": 0.3},
+    "conversation": {"affection": 0.2, "trust": 0.1, "respect": 0.1, "dependency": 0.0},
+    "ignore": {"affection": -0.3, "trust": -0.2, "respect": -0.2, "dependency": -0.1},
+}
+
+# 预计算为按 RELATION_COMPONENTS 排列的向量，避免每次互动重建字典
+_INTERACTION_EFFECTS: Dict[str, np.ndarray] = {
+    name: np.array([d.get(c, 0.0) for c in RELATION_COMPONENTS], dtype=np.float64)
+    for name, d in _RAW_INTERACTION_EFFECTS.items()
+}
+
+# 总体亲密度的加权系数（信任、尊重、喜爱、依赖）
+_INTIMACY_WEIGHTS = np.array([0.35, 0.25, 0.30, 0.10], dtype=np.float64)
+
+# 学习率，控制变化速度
+_LEARNING_RATE = 0.1
+
+# 每条关系保留的互动历史条数上限
+MAX_INTERACTION_HISTORY = 100
+
+# 关系时间衰减率：每天衰减1%
+_DECAY_RATE_PER_DAY = 0.01
+_SECONDS_PER_DAY = 86400
+
+
+@dataclass(slots=True)
 class DirectedRelation:
-    """有向关系类 - A对B的单向关系"""
+    """有向关系类 - A对B的单向关系（slots：图中边数为 N²，省去每个实例的 __dict__）"""
     from_agent: str
     to_agent: str
     
@@ -25,30 +66,54 @@ class DirectedRelation:
     relation_type: str = "stranger"  # 关系类型
     
     # 关系历史
-    interaction_history: List[Dict[str, Any]] = field(default_factory=list)
-    last_update_time: float = field(default_factory=lambda: datetime.now().timestamp())
+    interaction_history: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=MAX_INTERACTION_HISTORY))
+    last_update_time: float = field(default_factory=time.time)
     
     # 统计信息
     positive_interactions: int = 0  # 积极互动次数
     negative_interactions: int = 0  # 消极互动次数
     neutral_interactions: int = 0   # 中性互动次数
     
-    # 关系强度分解
-    trust: float = 0.0      # 信任度：-1.0 到 1.0
-    respect: float = 0.0    # 尊重度：-1.0 到 1.0
-    affection: float = 0.0  # 喜爱度：-1.0 到 1.0
-    dependency: float = 0.0 # 依赖度：-1.0 到 1.0
+    # 关系强度分解：[信任, 尊重, 喜爱, 依赖]，各分量 -1.0 到 1.0
+    components: np.ndarray = field(default_factory=lambda: np.zeros(4, dtype=np.float64), compare=False)
+    
+    @property
+    def trust(self) -> float:
+        return float(self.components[0])
+    
+    @trust.setter
+    def trust(self, value: float):
+        self.components[0] = value
+    
+    @property
+    def respect(self) -> float:
+        return float(self.components[1])
+    
+    @respect.setter
+    def respect(self, value: float):
+        self.components[1] = value
+    
+    @property
+    def affection(self) -> float:
+        return float(self.components[2])
+    
+    @affection.setter
+    def affection(self, value: float):
+        self.components[2] = value
+    
+    @property
+    def dependency(self) -> float:
+        return float(self.components[3])
+    
+    @dependency.setter
+    def dependency(self, value: float):
+        self.components[3] = value
     
     def update_intimacy_from_components(self):
         """从各个组成部分更新总体亲密度"""
         # 加权平均计算总体亲密度
-        self.intimacy = (
-            self.trust * 0.35 +
-            self.respect * 0.25 +
-            self.affection * 0.30 +
-            self.dependency * 0.10
-        )
-        self.intimacy = max(-1.0, min(1.0, self.intimacy))
+        intimacy = float(self.components @ _INTIMACY_WEIGHTS)
+        self.intimacy = max(-1.0, min(1.0, intimacy))
     
     def add_interaction(self, interaction_type: str, impact: float, context: str = ""):
         """添加互动记录并更新关系"""
@@ -57,7 +122,7 @@ class DirectedRelation:
             "type": interaction_type,
             "impact": impact,
             "context": context,
-            "timestamp": datetime.now().timestamp(),
+            "timestamp": time.time(),
             "intimacy_before": self.intimacy
         }
         
@@ -77,68 +142,42 @@ class DirectedRelation:
         
         # 记录互动后的状态
         interaction["intimacy_after"] = self.intimacy
+        # deque(maxlen) 自动丢弃最旧的记录，限制历史记录长度
         self.interaction_history.append(interaction)
-        self.last_update_time = datetime.now().timestamp()
-        
-        # 限制历史记录长度
-        if len(self.interaction_history) > 100:
-            self.interaction_history = self.interaction_history[-100:]
+        self.last_update_time = time.time()
     
     def _update_relation_components(self, interaction_type: str, impact: float):
         """根据互动类型更新关系各个维度"""
-        # 定义不同互动类型对各维度的影响
-        interaction_effects = {
-            "cooperation": {"trust": 0.8, "respect": 0.6, "affection": 0.4, "dependency": 0.2},
-            "conflict": {"trust": -0.7, "respect": -0.5, "affection": -0.8, "dependency": 0.0},
-            "help": {"trust": 0.6, "respect": 0.4, "affection": 0.7, "dependency": 0.5},
-            "betrayal": {"trust": -1.0, "respect": -0.6, "affection": -0.9, "dependency": -0.3},
-            "praise": {"respect": 0.7, "affection": 0.5, "trust": 0.3, "dependency": 0.0},
-            "criticism": {"respect": -0.4, "affection": -0.3, "trust": -0.2, "dependency": 0.0},
-            "support": {"trust": 0.5, "affection": 0.6, "respect": 0.4, "dependency": 0.3},
-            "rejection": {"affection": -0.8, "trust": -0.4, "respect": -0.3, "dependency": -0.2},
-            "competition": {"respect": 0.3, "trust": -0.2, "affection": -0.1, "dependency": 0.0},
-            "alliance": {"trust": 0.7, "dependency": 0.6, "respect": 0.5, "affection": 0.3},
-            "conversation": {"affection": 0.2, "trust": 0.1, "respect": 0.1, "dependency": 0.0},
-            "ignore": {"affection": -0.3, "trust": -0.2, "respect": -0.2, "dependency": -0.1},
-        }
-        
-        # 获取互动效果
-        effects = interaction_effects.get(interaction_type, {})
-        
-        # 应用影响（考虑impact强度）
-        learning_rate = 0.1  # 学习率，控制变化速度
+        effects = _INTERACTION_EFFECTS.get(interaction_type)
+        if effects is None:
+            return
         
-        for component, weight in effects.items():
-            current_value = getattr(self, component)
-            # 使用渐进式更新，避免剧烈变化
-            change = impact * weight * learning_rate
-            new_value = current_value + change
-            setattr(self, component, max(-1.0, min(1.0, new_value)))
+        # 使用渐进式更新（考虑impact强度），避免剧烈变化
+        np.clip(self.components + impact * _LEARNING_RATE * effects, -1.0, 1.0, out=self.components)
     
     def decay_over_time(self, time_passed: float):
         """关系随时间衰减（长时间不互动会导致关系淡化）"""
         # 计算衰减因子（基于时间）
-        decay_rate = 0.01  # 每天衰减1%
-        decay_factor = np.exp(-decay_rate * time_passed / 86400)  # 86400秒 = 1天
-        
-        # 关系向中性值（0.0）衰减
+        decay_factor = float(np.exp(-_DECAY_RATE_PER_DAY * time_passed / _SECONDS_PER_DAY))
+        self._apply_decay_factor(decay_factor)
+    
+    def _apply_decay_factor(self, decay_factor: float):
+        """关系向中性值（0.0）衰减"""
         self.intimacy *= decay_factor
-        self.trust *= decay_factor
-        self.respect *= decay_factor
-        self.affection *= decay_factor
-        self.dependency *= decay_factor
+        self.components *= decay_factor
     
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
+        """转换为字典（数值按 round 精确舍入到 4 位小数；四个分量一次 tolist 取出）"""
+        trust, respect, affection, dependency = self.components.tolist()
         return {
             "from_agent": self.from_agent,
             "to_agent": self.to_agent,
             "intimacy": round(self.intimacy, 4),
             "relation_type": self.relation_type,
-            "trust": round(self.trust, 4),
-            "respect": round(self.respect, 4),
-            "affection": round(self.affection, 4),
-            "dependency": round(self.dependency, 4),
+            "trust": round(trust, 4),
+            "respect": round(respect, 4),
+            "affection": round(affection, 4),
+            "dependency": round(dependency, 4),
             "positive_interactions": self.positive_interactions,
             "negative_interactions": self.negative_interactions,
             "neutral_interactions": self.neutral_interactions,
@@ -153,12 +192,13 @@ class DirectedRelationGraph:
     def __init__(self):
         # 关系图：{from_agent: {to_agent: DirectedRelation}}
         self.relations: Dict[str, Dict[str, DirectedRelation]] = {}
-        self.agent_ids: List[str] = []
+        # 有序字典充当有序集合：保持插入顺序，成员判断 O(1)
+        self.agent_ids: Dict[str, None] = {}
     
     def add_agent(self, agent_id: str):
         """添加Agent到图中"""
         if agent_id not in self.agent_ids:
-            self.agent_ids.append(agent_id)
+            self.agent_ids[agent_id] = None
             self.relations[agent_id] = {}
     
     def get_relation(self, from_agent: str, to_agent: str) -> Optional[DirectedRelation]:
@@ -214,43 +254,34 @@ class DirectedRelationGraph:
         if not relations:
             return
         
-        # 收集所有亲密度值
-        intimacy_values = [rel.intimacy for rel in relations.values()]
-        
-        if not intimacy_values:
-            return
+        # 一次性读入所有亲密度值，在向量上完成归一化后统一写回
+        vals = np.fromiter((rel.intimacy for rel in relations.values()),
+                           dtype=np.float64, count=len(relations))
         
         if method == "minmax":
             # Min-Max归一化到[-1, 1]
-            min_val = min(intimacy_values)
-            max_val = max(intimacy_values)
-            
-            if max_val > min_val:
-                for relation in relations.values():
-                    # 归一化到[-1, 1]
-                    normalized = 2 * (relation.intimacy - min_val) / (max_val - min_val) - 1
-                    relation.intimacy = normalized
+            min_val, max_val = vals.min(), vals.max()
+            if max_val <= min_val:
+                return
+            vals = 2 * (vals - min_val) / (max_val - min_val) - 1
         
         elif method == "zscore":
-            # Z-score标准化
-            mean_val = np.mean(intimacy_values)
-            std_val = np.std(intimacy_values)
-            
-            if std_val > 0:
-                for relation in relations.values():
-                    z_score = (relation.intimacy - mean_val) / std_val
-                    # 映射到[-1, 1]，使用tanh函数
-                    relation.intimacy = np.tanh(z_score)
+            # Z-score标准化，使用tanh映射到[-1, 1]
+            std_val = vals.std()
+            if std_val <= 0:
+                return
+            vals = np.tanh((vals - vals.mean()) / std_val)
         
         elif method == "softmax":
-            # Softmax归一化（保持相对大小）
-            exp_values = np.exp(intimacy_values)
-            sum_exp = np.sum(exp_values)
-            
-            for i, (to_agent, relation) in enumerate(relations.items()):
-                # Softmax后映射到[-1, 1]
-                softmax_val = exp_values[i] / sum_exp
-                relation.intimacy = 2 * softmax_val - 1
+            # Softmax归一化（保持相对大小），先减去最大值保证数值稳定
+            exp_values = np.exp(vals - vals.max())
+            vals = 2 * exp_values / exp_values.sum() - 1
+        
+        else:
+            return
+        
+        for relation, value in zip(relations.values(), vals.tolist()):
+            relation.intimacy = value
     
     def normalize_all_agents(self, method: str = "minmax"):
         """标准化所有Agent的关系值"""
@@ -278,12 +309,19 @@ class DirectedRelationGraph:
         return abs(intimacy_1_to_2 - intimacy_2_to_1) / 2.0
     
     def apply_time_decay(self, current_time: float):
-        """对所有关系应用时间衰减"""
-        for agent_id, relations in self.relations.items():
-            for to_agent, relation in relations.items():
-                time_passed = current_time - relation.last_update_time
-                if time_passed > 0:
-                    relation.decay_over_time(time_passed)
+        """对所有关系应用时间衰减（整张图的衰减因子一次性向量化计算）"""
+        rels = [rel for relations in self.relations.values() for rel in relations.values()]
+        if not rels:
+            return
+        
+        time_passed = current_time - np.fromiter(
+            (rel.last_update_time for rel in rels), dtype=np.float64, count=len(rels)
+        )
+        factors = np.exp(-_DECAY_RATE_PER_DAY * time_passed / _SECONDS_PER_DAY)
+        
+        for rel, passed, factor in zip(rels, (time_passed > 0).tolist(), factors.tolist()):
+            if passed:
+                rel._apply_decay_factor(factor)
     
     def get_agent_statistics(self, agent_id: str) -> Dict[str, Any]:
         """获取Agent的关系统计信息"""
@@ -292,25 +330,28 @@ class DirectedRelationGraph:
         
         relations = self.relations[agent_id]
         
-        # 统计信息
-        intimacy_values = [rel.intimacy for rel in relations.values()]
-        positive_relations = [v for v in intimacy_values if v > 0.3]
-        negative_relations = [v for v in intimacy_values if v < -0.3]
-        neutral_relations = [v for v in intimacy_values if -0.3 <= v <= 0.3]
+        # 统计信息：一次读入向量，用布尔掩码计数
+        n = len(relations)
+        to_agents = list(relations)
+        vals = np.fromiter((rel.intimacy for rel in relations.values()), dtype=np.float64, count=n)
+        positive_count = int((vals > 0.3).sum())
+        negative_count = int((vals < -0.3).sum())
         
-        # 找出最亲密和最敌对的关系
-        sorted_relations = sorted(relations.items(), key=lambda x: x[1].intimacy, reverse=True)
+        # 找出最亲密和最敌对的关系：一次稳定降序排序，同值保持插入顺序（与 sorted(reverse=True) 一致）
+        order = np.argsort(-vals, kind="stable")
+        top_idx = order[:3]
+        bottom_idx = order[-3:]
         
         stats = {
             "agent_id": agent_id,
-            "total_relations": len(relations),
-            "positive_relations": len(positive_relations),
-            "negative_relations": len(negative_relations),
-            "neutral_relations": len(neutral_relations),
-            "average_intimacy": np.mean(intimacy_values) if intimacy_values else 0.0,
-            "intimacy_std": np.std(intimacy_values) if intimacy_values else 0.0,
-            "closest_allies": [(to_agent, rel.intimacy) for to_agent, rel in sorted_relations[:3]],
-            "worst_enemies": [(to_agent, rel.intimacy) for to_agent, rel in sorted_relations[-3:]],
+            "total_relations": n,
+            "positive_relations": positive_count,
+            "negative_relations": negative_count,
+            "neutral_relations": n - positive_count - negative_count,
+            "average_intimacy": float(vals.mean()) if n else 0.0,
+            "intimacy_std": float(vals.std()) if n else 0.0,
+            "closest_allies": [(to_agents[i], float(vals[i])) for i in top_idx.tolist()],
+            "worst_enemies": [(to_agents[i], float(vals[i])) for i in bottom_idx.tolist()],
         }
         
         return stats
@@ -318,7 +359,7 @@ class DirectedRelationGraph:
     def export_to_dict(self) -> Dict[str, Any]:
         """导出整个关系图为字典"""
         export_data = {
-            "agents": self.agent_ids,
+            "agents": list(self.agent_ids),
             "relations": {}
         }
         
@@ -333,12 +374,12 @@ class DirectedRelationGraph:
     def export_to_json(self, filepath: str):
         """导出关系图到JSON文件"""
         data = self.export_to_dict()
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(filepath, 'wb') as f:
+            f.write(jsonio.dumps_bytes(data, indent=True))
     
     def import_from_dict(self, data: Dict[str, Any]):
         """从字典导入关系图"""
-        self.agent_ids = data.get("agents", [])
+        self.agent_ids = dict.fromkeys(data.get("agents", []))
         self.relations = {}
         
         for from_agent, relations in data.get("relations", {}).items():
@@ -365,16 +406,20 @@ class DirectedRelationGraph:
         if not self.agent_ids:
             return "No agents in graph"
         
-        # 创建矩阵
+        # 创建矩阵：只遍历已存在的边（O(边数)），缺失的边保持为0
         n = len(self.agent_ids)
+        index = {aid: i for i, aid in enumerate(self.agent_ids)}
         matrix = np.zeros((n, n))
         
-        for i, from_agent in enumerate(self.agent_ids):
-            for j, to_agent in enumerate(self.agent_ids):
-                if i != j:
-                    relation = self.get_relation(from_agent, to_agent)
-                    if relation:
-                        matrix[i][j] = relation.intimacy
+        for from_agent, relations in self.relations.items():
+            i = index.get(from_agent)
+            if i is None:
+                continue
+            row = matrix[i]
+            for to_agent, relation in relations.items():
+                j = index.get(to_agent)
+                if j is not None and j != i:
+                    row[j] = relation.intimacy
         
         # 生成文本表示
         lines = ["关系矩阵（行：from, 列：to）:"]
@@ -386,16 +431,12 @@ class DirectedRelationGraph:
         lines.append("-" * 80)
         
         # 矩阵内容
-        for i, from_agent in enumerate(self.agent_ids):
-            row = f"{from_agent[:15]:15} | "
-            for j in range(n):
-                if i == j:
-                    row += "    -   "
-                else:
-                    val = matrix[i][j]
-                    color = "+" if val > 0 else "-" if val < 0 else " "
-                    row += f"{color}{abs(val):>6.3f} "
-            lines.append(row)
+        for i, (from_agent, values) in enumerate(zip(self.agent_ids, matrix.tolist())):
+            cells = [
+                "    -   " if j == i else f"{'+' if val > 0 else '-' if val < 0 else ' '}{abs(val):>6.3f} "
+                for j, val in enumerate(values)
+            ]
+            lines.append(f"{from_agent[:15]:15} | " + "".join(cells))
         
         return "\n".join(lines)
 
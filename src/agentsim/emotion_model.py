@@ -11,10 +11,14 @@
 6. 社会学情绪理论 (Hochschild) - 情绪的社会建构和情绪劳动
 """
 
-import random
+import io
 import math
-from typing import Dict, List, Tuple, Optional, Any
-from dataclasses import dataclass, field
+from collections import Counter
+from functools import lru_cache
+import re
+import sys
+from time import time as _now
+from typing import Dict, FrozenSet, List, Tuple, Optional, Any, Pattern, Set
 from enum import Enum
 import numpy as np
 
@@ -49,189 +53,215 @@ class EmotionDimension(Enum):
     HOPE = "hope"             # 希望: -0.5 (绝望) 到 1.0 (极度希望)
 
 
-@dataclass
-class EmotionProfile:
-    """情绪画像类 - 包含多个情绪维度的数值，支持负值和更丰富的情绪表达"""
-
+# 情绪维度顺序：EmotionProfile.vec 的第 i 个分量即 _DIMS[i]
+# 维度名显式驻留：to_dict/from_dict/关键词分析中作为字典键反复使用，均指向同一字符串对象
+_DIMS: Tuple[str, ...] = tuple(map(sys.intern, (
     # PAD三维模型维度
-    valence: float = 0.0      # 效价: -1.0 到 1.0
-    arousal: float = 0.0      # 唤醒度: -1.0 到 1.0 (支持负值表示过度平静)
-    dominance: float = 0.0    # 支配感: -1.0 到 1.0 (支持负值表示过度顺从)
-
-    # 基本情绪维度 - 支持负值表示相反情绪
-    joy: float = 0.0          # 快乐: -0.5 到 1.0 (负值表示沮丧)
-    sadness: float = 0.0      # 悲伤: -0.5 到 1.0 (负值表示愉悦)
-    anger: float = 0.0        # 愤怒: -0.5 到 1.0 (负值表示平静)
-    fear: float = 0.0         # 恐惧: -0.5 到 1.0 (负值表示勇敢)
-    surprise: float = 0.0     # 惊讶: -1.0 到 1.0 (负值表示完全预期)
-    disgust: float = 0.0      # 厌恶: -0.5 到 1.0 (负值表示欣赏)
-
+    "valence", "arousal", "dominance",
+    # 基本情绪维度
+    "joy", "sadness", "anger", "fear", "surprise", "disgust",
     # 社会情绪维度
-    trust: float = 0.0        # 信任: -1.0 到 1.0 (负值表示怀疑)
-    anticipation: float = 0.0 # 期待: -0.5 到 1.0 (负值表示焦虑)
-
+    "trust", "anticipation",
     # 复合情绪维度
-    optimism: float = 0.0     # 乐观: -0.5 到 1.0 (负值表示悲观)
-    anxiety: float = 0.0      # 焦虑: -0.5 到 1.0 (负值表示放松)
-    guilt: float = 0.0        # 内疚: -0.5 到 1.0 (负值表示自豪)
-    pride: float = 0.0        # 自豪: -0.5 到 1.0 (负值表示羞愧)
-    shame: float = 0.0        # 羞耻: -0.5 到 1.0 (负值表示自信)
-    envy: float = 0.0         # 嫉妒: -0.5 到 1.0 (负值表示满足)
-    gratitude: float = 0.0    # 感激: -0.5 到 1.0 (负值表示怨恨)
-    hope: float = 0.0         # 希望: -0.5 到 1.0 (负值表示绝望)
-
-    # 情绪元数据
-    timestamp: Optional[float] = None  # 情绪记录时间戳
-    context: str = ""         # 情绪产生的上下文
-    intensity: float = 0.0    # 情绪总体强度
-    
-    def __post_init__(self):
-        """初始化后验证和归一化所有数值"""
-        self.normalize()
-        if self.timestamp is None:
-            self.timestamp = np.datetime64('now').astype(float)
-    
-    def normalize(self) -> None:
-        """归一化所有情绪数值到有效范围内"""
-        # PAD维度
-        self.valence = max(-1.0, min(1.0, self.valence))
-        self.arousal = max(-1.0, min(1.0, self.arousal))
-        self.dominance = max(-1.0, min(1.0, self.dominance))
-
-        # 基本情绪维度 - 支持负值但限制范围（需要回写到属性上）
-        for name in [
-            "joy", "sadness", "anger", "fear",
-            "disgust", "anticipation", "optimism",
-            "anxiety", "guilt", "pride", "shame",
-            "envy", "gratitude", "hope",
-        ]:
-            value = getattr(self, name)
-            setattr(self, name, max(-0.5, min(1.0, value)))
+    "optimism", "anxiety", "guilt", "pride", "shame", "envy", "gratitude", "hope",
+)))
+_DIM_INDEX: Dict[str, int] = {name: i for i, name in enumerate(_DIMS)}
+_N_DIMS = len(_DIMS)
 
+# 各维度取值范围：PAD、惊讶、信任为 [-1, 1]，其余为 [-0.5, 1]
+_LOW: np.ndarray = np.array(
+    [-1.0 if name in ("valence", "arousal", "dominance", "surprise", "trust") else -0.5 for name in _DIMS],
+    dtype=np.float64,
+)
+_HIGH: np.ndarray = np.ones(_N_DIMS, dtype=np.float64)
+_SQRT3 = math.sqrt(3)
+# 两个画像间的最大可能距离 (2^2 * 维度数)
+_MAX_DISTANCE = math.sqrt(_N_DIMS * 4)
+
+
+def _blend(a: np.ndarray, alpha: Any, b: np.ndarray, beta: Any) -> np.ndarray:
+    """a * alpha + b * beta：标量系数先合并，第二项就地累加，只产生一个中间数组"""
+    out = np.multiply(a, alpha)
+    out += b * beta
+    return out
+
+
+class EmotionProfile:
+    """情绪画像类 - 包含多个情绪维度的数值，支持负值和更丰富的情绪表达
+
+    19 个情绪维度连续存放在一个 float64 向量 vec 中（顺序见 _DIMS），
+    valence/joy/... 等同名属性按下标读写该向量。
+    """
+
+    # 固定的实例槽位，无 __dict__（大量短生命周期对象由 blend/evolve/模板生成产生）
+    # _normalized：vec 当前是否确定落在 [_LOW, _HIGH] 内；经属性赋值修改后置 False
+    # _primary/_mood_desc/_quadrant：get_primary_emotion/get_mood_description/get_emotion_quadrant
+    # 的惰性缓存，vec 变化时清空
+    # （直接改写 vec 元素后应调用 normalize()，以刷新范围标记与缓存）
+    __slots__ = ("vec", "timestamp", "context", "intensity", "_normalized", "_primary", "_mood_desc", "_quadrant")
+
+    # 全部情绪维度名（与 vec 下标一一对应）；模式固定，无需从 to_dict() 的键推导
+    DIMENSIONS: Tuple[str, ...] = _DIMS
+
+    def __init__(
+        self,
+        # PAD三维模型维度
+        valence: float = 0.0,      # 效价: -1.0 到 1.0
+        arousal: float = 0.0,      # 唤醒度: -1.0 到 1.0 (支持负值表示过度平静)
+        dominance: float = 0.0,    # 支配感: -1.0 到 1.0 (支持负值表示过度顺从)
+        # 基本情绪维度 - 支持负值表示相反情绪
+        joy: float = 0.0,          # 快乐: -0.5 到 1.0 (负值表示沮丧)
+        sadness: float = 0.0,      # 悲伤: -0.5 到 1.0 (负值表示愉悦)
+        anger: float = 0.0,        # 愤怒: -0.5 到 1.0 (负值表示平静)
+        fear: float = 0.0,         # 恐惧: -0.5 到 1.0 (负值表示勇敢)
+        surprise: float = 0.0,     # 惊讶: -1.0 到 1.0 (负值表示完全预期)
+        disgust: float = 0.0,      # 厌恶: -0.5 到 1.0 (负值表示欣赏)
         # 社会情绪维度
-        self.trust = max(-1.0, min(1.0, self.trust))
-        self.surprise = max(-1.0, min(1.0, self.surprise))
+        trust: float = 0.0,        # 信任: -1.0 到 1.0 (负值表示怀疑)
+        anticipation: float = 0.0, # 期待: -0.5 到 1.0 (负值表示焦虑)
+        # 复合情绪维度
+        optimism: float = 0.0,     # 乐观: -0.5 到 1.0 (负值表示悲观)
+        anxiety: float = 0.0,      # 焦虑: -0.5 到 1.0 (负值表示放松)
+        guilt: float = 0.0,        # 内疚: -0.5 到 1.0 (负值表示自豪)
+        pride: float = 0.0,        # 自豪: -0.5 到 1.0 (负值表示羞愧)
+        shame: float = 0.0,        # 羞耻: -0.5 到 1.0 (负值表示自信)
+        envy: float = 0.0,         # 嫉妒: -0.5 到 1.0 (负值表示满足)
+        gratitude: float = 0.0,    # 感激: -0.5 到 1.0 (负值表示怨恨)
+        hope: float = 0.0,         # 希望: -0.5 到 1.0 (负值表示绝望)
+        # 情绪元数据
+        timestamp: Optional[float] = None,  # 情绪记录时间戳
+        context: str = "",         # 情绪产生的上下文
+        intensity: float = 0.0,    # 情绪总体强度
+    ):
+        self._init_from_vec(np.array([
+            valence, arousal, dominance,
+            joy, sadness, anger, fear, surprise, disgust,
+            trust, anticipation,
+            optimism, anxiety, guilt, pride, shame, envy, gratitude, hope,
+        ], dtype=np.float64), timestamp, context, intensity)
+
+    def _init_from_vec(self, vec: np.ndarray, timestamp: Optional[float], context: str, intensity: float,
+                       normalized: bool = False) -> None:
+        self.vec: np.ndarray = vec
+        self.timestamp = timestamp
+        self.context = context
+        self.intensity = intensity
+        self._primary: Optional[str] = None
+        self._mood_desc: Optional[str] = None
+        self._quadrant: Optional[str] = None
+
+        # 初始化后验证和归一化所有数值（调用方保证已在范围内时只需计算强度）
+        if normalized:
+            self._normalized = True
+            self._calculate_intensity()
+        else:
+            self.normalize()
+        if self.timestamp is None:
+            self.timestamp = _now()
+
+    @classmethod
+    def from_vec(cls, vec: np.ndarray, timestamp: Optional[float] = None, context: str = "",
+                 normalized: bool = False) -> 'EmotionProfile':
+        """由按 _DIMS 排列的 19 维向量直接构造（不复制，vec 归新对象所有并被原地归一化）
+
+        normalized=True 表示调用方保证 vec 已在取值范围内（如两个已归一化向量的凸组合），跳过裁剪。
+        """
+        profile = cls.__new__(cls)
+        profile._init_from_vec(np.asarray(vec, dtype=np.float64), timestamp, context, 0.0, normalized)
+        return profile
+
+    def __repr__(self) -> str:
+        dims = ", ".join(f"{name}={value!r}" for name, value in zip(_DIMS, self.vec.tolist()))
+        return (f"{type(self).__name__}({dims}, timestamp={self.timestamp!r}, "
+                f"context={self.context!r}, intensity={self.intensity!r})")
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (bool(np.array_equal(self.vec, other.vec))
+                and (self.timestamp, self.context, self.intensity)
+                == (other.timestamp, other.context, other.intensity))
+
+    __hash__ = None  # 可变对象，与原 dataclass(eq=True) 一致不可哈希
+
+    def normalize(self) -> None:
+        """归一化所有情绪数值到有效范围内（按 _LOW/_HIGH 原地裁剪）"""
+        np.clip(self.vec, _LOW, _HIGH, out=self.vec)
+        self._normalized = True
+        self._primary = self._mood_desc = self._quadrant = None
 
         # 计算情绪强度
         self._calculate_intensity()
 
     def _calculate_intensity(self) -> None:
         """计算情绪总体强度"""
-        # 基于PAD维度的强度计算
-        pad_intensity = np.sqrt(self.valence**2 + self.arousal**2 + self.dominance**2) / np.sqrt(3)
+        v = self.vec
+        # 基于PAD维度的强度计算（vec[0:3]）
+        pad = v[:3]
+        pad_intensity = math.sqrt(float(pad @ pad)) / _SQRT3
 
-        # 基于基本情绪维度的强度计算
-        basic_emotions = [self.joy, self.sadness, self.anger, self.fear,
-                         self.surprise, self.disgust, self.trust, self.anticipation]
-        basic_intensity = np.mean([abs(e) for e in basic_emotions])
+        # 基于基本情绪维度的强度计算（joy..anticipation 即 vec[3:11]）
+        basic_intensity = float(np.abs(v[3:11]).mean())
 
         # 综合强度
         self.intensity = (pad_intensity + basic_intensity) / 2
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式，包含所有情绪维度和元数据"""
-        return {
-            # PAD维度
-            "valence": round(self.valence, 3),
-            "arousal": round(self.arousal, 3),
-            "dominance": round(self.dominance, 3),
-
-            # 基本情绪维度
-            "joy": round(self.joy, 3),
-            "sadness": round(self.sadness, 3),
-            "anger": round(self.anger, 3),
-            "fear": round(self.fear, 3),
-            "surprise": round(self.surprise, 3),
-            "disgust": round(self.disgust, 3),
-
-            # 社会情绪维度
-            "trust": round(self.trust, 3),
-            "anticipation": round(self.anticipation, 3),
-
-            # 复合情绪维度
-            "optimism": round(self.optimism, 3),
-            "anxiety": round(self.anxiety, 3),
-            "guilt": round(self.guilt, 3),
-            "pride": round(self.pride, 3),
-            "shame": round(self.shame, 3),
-            "envy": round(self.envy, 3),
-            "gratitude": round(self.gratitude, 3),
-            "hope": round(self.hope, 3),
-
-            # 元数据
-            "intensity": round(self.intensity, 3),
-            "timestamp": self.timestamp,
-            "context": self.context
-        }
+        # 维度值一次性量化到 3 位小数
+        data: Dict[str, Any] = dict(zip(_DIMS, [round(v, 3) for v in self.vec.tolist()]))
+
+        # 元数据
+        data["intensity"] = round(self.intensity, 3)
+        data["timestamp"] = self.timestamp
+        data["context"] = self.context
+        return data
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'EmotionProfile':
-        """从字典创建情绪画像"""
-        return cls(
-            valence=float(data.get("valence", 0.0)),
-            arousal=float(data.get("arousal", 0.0)),
-            dominance=float(data.get("dominance", 0.0)),
-            joy=float(data.get("joy", 0.0)),
-            sadness=float(data.get("sadness", 0.0)),
-            anger=float(data.get("anger", 0.0)),
-            fear=float(data.get("fear", 0.0)),
-            surprise=float(data.get("surprise", 0.0)),
-            disgust=float(data.get("disgust", 0.0)),
-            trust=float(data.get("trust", 0.0)),
-            anticipation=float(data.get("anticipation", 0.0)),
-            optimism=float(data.get("optimism", 0.0)),
-            anxiety=float(data.get("anxiety", 0.0)),
-            guilt=float(data.get("guilt", 0.0)),
-            pride=float(data.get("pride", 0.0)),
-            shame=float(data.get("shame", 0.0)),
-            envy=float(data.get("envy", 0.0)),
-            gratitude=float(data.get("gratitude", 0.0)),
-            hope=float(data.get("hope", 0.0)),
-            timestamp=data.get("timestamp"),
-            context=data.get("context", "")
-        )
+        """从字典创建情绪画像（按 _DIMS 顺序一次收集为向量）"""
+        vec = np.fromiter((float(data.get(name, 0.0)) for name in _DIMS), dtype=np.float64, count=_N_DIMS)
+        return cls.from_vec(vec, timestamp=data.get("timestamp"), context=data.get("context", ""))
     
     def get_primary_emotions(self) -> List[Tuple[str, float]]:
         """获取主要情绪列表（强度最高的几个情绪）"""
-        # 所有情绪维度及其强度
-        all_emotions = {
-            "joy": self.joy,
-            "sadness": self.sadness,
-            "anger": self.anger,
-            "fear": self.fear,
-            "surprise": self.surprise,
-            "disgust": self.disgust,
-            "trust": self.trust,
-            "anticipation": self.anticipation,
-            "optimism": self.optimism,
-            "anxiety": self.anxiety,
-            "guilt": self.guilt,
-            "pride": self.pride,
-            "shame": self.shame,
-            "envy": self.envy,
-            "gratitude": self.gratitude,
-            "hope": self.hope
-        }
+        # 所有情绪维度（joy 及之后，即 vec[3:]）的强度
+        values = self.vec[3:]
+        scores = np.abs(values)
 
         # 过滤出强度大于阈值的情绪
-        significant_emotions = [(name, value) for name, value in all_emotions.items()
-                               if abs(value) > 0.2]
+        idx = np.flatnonzero(scores > 0.2)
 
-        # 按强度绝对值排序
-        significant_emotions.sort(key=lambda x: abs(x[1]), reverse=True)
+        # 超过 3 个时线性选出第 3 大的强度：严格更大的全部保留，相等的按维度顺序补足 3 个
+        if len(idx) > 3:
+            kth = np.partition(scores[idx], -3)[-3]
+            above = idx[scores[idx] > kth]
+            ties = idx[scores[idx] == kth][:3 - len(above)]
+            idx = np.concatenate((above, ties))
 
-        # 返回强度最高的前3个情绪
-        return significant_emotions[:3]
+        # 按强度绝对值降序（稳定排序，同强度保持维度顺序）
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        return [(_DIMS[3 + i], v) for i, v in zip(idx.tolist(), values[idx].tolist())]
 
     def get_primary_emotion(self) -> str:
-        """获取主要情绪标签（向后兼容）"""
-        primary_emotions = self.get_primary_emotions()
-        if primary_emotions:
-            return primary_emotions[0][0]
-        return "neutral"
+        """获取主要情绪标签（向后兼容，按当前 vec 缓存）"""
+        if self._primary is None:
+            primary_emotions = self.get_primary_emotions()
+            self._primary = primary_emotions[0][0] if primary_emotions else "neutral"
+        return self._primary
+
+    def _mark_modified(self) -> None:
+        """vec 被原地修改后调用：不再保证在范围内，描述缓存失效"""
+        self._normalized = False
+        self._primary = self._mood_desc = self._quadrant = None
 
     def get_mood_description(self) -> str:
-        """获取情绪描述文本，支持多维情绪"""
+        """获取情绪描述文本，支持多维情绪（按当前 vec 缓存）"""
+        if self._mood_desc is None:
+            self._mood_desc = self._describe_mood()
+        return self._mood_desc
+
+    def _describe_mood(self) -> str:
         primary_emotions = self.get_primary_emotions()
 
         if not primary_emotions:
@@ -267,7 +297,12 @@ class EmotionProfile:
             return f"{intensity_desc}{', '.join(emotion_names[:-1])} and {emotion_names[-1]}"
 
     def get_emotion_quadrant(self) -> str:
-        """基于PAD模型获取情绪象限"""
+        """基于PAD模型获取情绪象限（按当前 vec 缓存）"""
+        if self._quadrant is None:
+            self._quadrant = self._compute_quadrant()
+        return self._quadrant
+
+    def _compute_quadrant(self) -> str:
         if self.valence > 0.2 and self.arousal > 0.2:
             return "excited"
         elif self.valence > 0.2 and self.arousal < -0.2:
@@ -297,55 +332,111 @@ class EmotionProfile:
 
     def similarity(self, other: 'EmotionProfile') -> float:
         """计算与另一个情绪画像的相似度"""
-        # 计算所有维度的欧几里得距离
-        dimensions = [
-            self.valence, self.arousal, self.dominance,
-            self.joy, self.sadness, self.anger, self.fear, self.surprise, self.disgust,
-            self.trust, self.anticipation, self.optimism, self.anxiety,
-            self.guilt, self.pride, self.shame, self.envy, self.gratitude, self.hope
-        ]
-
-        other_dimensions = [
-            other.valence, other.arousal, other.dominance,
-            other.joy, other.sadness, other.anger, other.fear, other.surprise, other.disgust,
-            other.trust, other.anticipation, other.optimism, other.anxiety,
-            other.guilt, other.pride, other.shame, other.envy, other.gratitude, other.hope
-        ]
-
-        # 计算欧几里得距离
-        distance = np.sqrt(sum((a - b) ** 2 for a, b in zip(dimensions, other_dimensions)))
+        # 所有维度的欧几里得距离
+        distance = float(np.linalg.norm(self.vec - other.vec))
 
         # 转换为相似度 (0-1之间，1表示完全相同)
-        max_distance = np.sqrt(len(dimensions) * 4)  # 最大可能距离 (2^2 * 维度数)
-        similarity = 1 - (distance / max_distance)
+        similarity = 1 - (distance / _MAX_DISTANCE)
 
         return max(0.0, min(1.0, similarity))
 
     def blend_with(self, other: 'EmotionProfile', weight: float = 0.5) -> 'EmotionProfile':
         """与另一个情绪画像混合"""
-        return EmotionProfile(
-            valence=self.valence * (1 - weight) + other.valence * weight,
-            arousal=self.arousal * (1 - weight) + other.arousal * weight,
-            dominance=self.dominance * (1 - weight) + other.dominance * weight,
-            joy=self.joy * (1 - weight) + other.joy * weight,
-            sadness=self.sadness * (1 - weight) + other.sadness * weight,
-            anger=self.anger * (1 - weight) + other.anger * weight,
-            fear=self.fear * (1 - weight) + other.fear * weight,
-            surprise=self.surprise * (1 - weight) + other.surprise * weight,
-            disgust=self.disgust * (1 - weight) + other.disgust * weight,
-            trust=self.trust * (1 - weight) + other.trust * weight,
-            anticipation=self.anticipation * (1 - weight) + other.anticipation * weight,
-            optimism=self.optimism * (1 - weight) + other.optimism * weight,
-            anxiety=self.anxiety * (1 - weight) + other.anxiety * weight,
-            guilt=self.guilt * (1 - weight) + other.guilt * weight,
-            pride=self.pride * (1 - weight) + other.pride * weight,
-            shame=self.shame * (1 - weight) + other.shame * weight,
-            envy=self.envy * (1 - weight) + other.envy * weight,
-            gratitude=self.gratitude * (1 - weight) + other.gratitude * weight,
-            hope=self.hope * (1 - weight) + other.hope * weight,
-            context=f"blend of '{self.context}' and '{other.context}'"
+        # 两个已归一化画像的凸组合必然仍在范围内，无需再裁剪
+        return EmotionProfile.from_vec(
+            _blend(self.vec, 1 - weight, other.vec, weight),
+            context=f"blend of '{self.context}' and '{other.context}'",
+            normalized=self._normalized and other._normalized and 0.0 <= weight <= 1.0
+        )
+
+
+def _dim_property(index: int, name: str) -> property:
+    """生成按下标读写 EmotionProfile.vec 的属性"""
+    def fget(self: EmotionProfile) -> float:
+        return float(self.vec[index])
+
+    def fset(self: EmotionProfile, value: float) -> None:
+        self.vec[index] = value
+        self._mark_modified()
+
+    return property(fget, fset, doc=f"情绪维度 {name}（vec[{index}]）")
+
+
+for _i, _name in enumerate(_DIMS):
+    setattr(EmotionProfile, _name, _dim_property(_i, _name))
+del _i, _name
+
+
+class EmotionBatch:
+    """一组情绪画像的批量表示 - matrix 为 (N, 19) 矩阵，第 i 行即第 i 个画像的 vec（按 _DIMS 排列）"""
+
+    __slots__ = ("matrix", "contexts", "timestamps")
+
+    def __init__(self, matrix: np.ndarray, contexts: Optional[List[str]] = None,
+                 timestamps: Optional[List[Optional[float]]] = None):
+        self.matrix: np.ndarray = np.asarray(matrix, dtype=np.float64).reshape(-1, _N_DIMS)
+        n = len(self.matrix)
+        self.contexts: List[str] = list(contexts) if contexts is not None else [""] * n
+        self.timestamps: List[Optional[float]] = list(timestamps) if timestamps is not None else [None] * n
+
+    def __len__(self) -> int:
+        return len(self.matrix)
+
+    @classmethod
+    def from_profiles(cls, profiles: List[EmotionProfile]) -> 'EmotionBatch':
+        """由若干 EmotionProfile 堆叠（复制各自的 vec）"""
+        if not profiles:
+            return cls(np.empty((0, _N_DIMS), dtype=np.float64))
+        return cls(
+            np.stack([p.vec for p in profiles]),
+            contexts=[p.context for p in profiles],
+            timestamps=[p.timestamp for p in profiles],
         )
 
+    def to_profiles(self) -> List[EmotionProfile]:
+        """拆回逐个 EmotionProfile（每行复制一份）"""
+        return [
+            EmotionProfile.from_vec(row.copy(), timestamp=ts, context=ctx)
+            for row, ts, ctx in zip(self.matrix, self.timestamps, self.contexts)
+        ]
+
+    def normalize(self) -> None:
+        """对所有行按 _LOW/_HIGH 原地裁剪"""
+        np.clip(self.matrix, _LOW, _HIGH, out=self.matrix)
+
+    @property
+    def intensity(self) -> np.ndarray:
+        """各行的情绪总体强度，计算方式与 EmotionProfile._calculate_intensity 相同"""
+        m = self.matrix
+        pad_intensity = np.sqrt(np.einsum("ij,ij->i", m[:, :3], m[:, :3])) / _SQRT3
+        basic_intensity = np.abs(m[:, 3:11]).mean(axis=1)
+        return (pad_intensity + basic_intensity) / 2
+
+
+def _effects_matrix(keyword_table: Dict[str, Tuple[str, ...]], effects: Dict[str, Dict[str, float]]) -> np.ndarray:
+    """把 {分组: {维度: 增量}} 展开为 (分组数, 19) 增量矩阵，行序与 keyword_table 一致"""
+    matrix = np.zeros((len(keyword_table), _N_DIMS), dtype=np.float64)
+    for row, group in enumerate(keyword_table):
+        for dim, delta in effects[group].items():
+            matrix[row, _DIM_INDEX[dim]] = delta
+    return matrix
+
+
+def _intern_keyword_table(table: Dict[str, Tuple[str, ...]]) -> Dict[str, Tuple[str, ...]]:
+    """驻留关键词表中的分组名与关键词（含空格短语与中文，这些不会被编译器自动驻留）"""
+    return {sys.intern(group): tuple(map(sys.intern, words)) for group, words in table.items()}
+
+
+def _compile_keyword_scanner(*keyword_tables: Dict[str, Tuple[str, ...]]) -> Tuple[Pattern[str], Dict[str, FrozenSet[str]]]:
+    """把若干 {分组: [关键词]} 表编译成单次扫描用的正则
+
+    返回 (pattern, covers)：pattern 用前瞻在每个位置报告最长的关键词（允许重叠匹配），
+    covers[w] 为 w 本身及所有是 w 子串的关键词——据此还原逐词 `word in text` 的子串语义。
+    """
+    words = sorted({w for table in keyword_tables for kws in table.values() for w in kws}, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, words)) + "))")
+    covers = {w: frozenset(k for k in words if k in w) for w in words}
+    return pattern, covers
 
 class EmotionGenerator:
     """情绪生成器 - 根据情境和人格生成合适的情绪状态，支持多维情绪"""
@@ -448,40 +539,109 @@ class EmotionGenerator:
             context="ignored and insignificant"
         ),
     }
+
+    # 模板向量按行堆叠成 (模板数, 19) 矩阵，_TEMPLATE_INDEX 为 模板名→行号
+    _TEMPLATE_INDEX: Dict[str, int] = {name: i for i, name in enumerate(EMOTION_TEMPLATES)}
+    _TEMPLATE_MATRIX: np.ndarray = np.stack([template.vec for template in EMOTION_TEMPLATES.values()])
+    _TEMPLATE_CONTEXTS: Tuple[str, ...] = tuple(template.context for template in EMOTION_TEMPLATES.values())
+    _NEUTRAL_ROW: int = _TEMPLATE_INDEX["neutral"]
+    # 模板随机变化共用的 PCG64 生成器（每次一次性抽取 19 维）
+    _RNG: np.random.Generator = np.random.default_rng()
+
+    # 上下文情绪关键词（支持中英文；常量表，元组不可变）
+    # 积极情绪关键词
+    POSITIVE_KEYWORDS = _intern_keyword_table({
+        "joy": ("happy", "joy", "delighted", "pleased", "satisfied"),
+        "gratitude": ("thankful", "grateful", "appreciative"),
+        "pride": ("proud", "accomplished", "successful"),
+        "hope": ("hopeful", "optimistic", "looking forward"),
+        "trust": ("trust", "reliable", "dependable"),
+        "love": ("love", "affection", "care")
+    })
+
+    # 消极情绪关键词
+    NEGATIVE_KEYWORDS = _intern_keyword_table({
+        "sadness": ("sad", "unhappy", "depressed", "melancholy", "sorrow"),
+        "anger": ("angry", "mad", "frustrated", "irritated", "annoyed"),
+        "fear": ("scared", "frightened", "terrified", "afraid", "worried"),
+        "disgust": ("disgusted", "repelled", "revolted", "grossed out"),
+        "shame": ("ashamed", "embarrassed", "humiliated"),
+        "guilt": ("guilty", "remorseful", "regretful"),
+        "envy": ("envious", "jealous", "covetous"),
+        "anxiety": ("anxious", "nervous", "worried", "stressed")
+    })
+
+    # 情境关键词（含中文）
+    SITUATION_KEYWORDS = _intern_keyword_table({
+        "threat": ("threat", "danger", "risk", "menace", "hazard", "威胁", "危险"),
+        "challenge": ("challenge", "obstacle", "difficulty", "problem", "挑战", "困难"),
+        "support": ("support", "help", "assistance", "aid", "支持", "帮助"),
+        "rejection": ("rejected", "ignored", "excluded", "dismissed", "拒绝", "忽视"),
+        "success": ("success", "achievement", "victory", "triumph", "成功", "胜利"),
+        "failure": ("failure", "defeat", "loss", "disappointment", "失败", "挫败"),
+        "surprise": ("surprise", "unexpected", "sudden", "shocking", "惊讶", "意外")
+    })
+
+    # 情境对各情绪维度的影响
+    SITUATION_EFFECTS = {
+        "threat": {"fear": 0.6, "anxiety": 0.4, "valence": -0.4, "arousal": 0.5},
+        "challenge": {"anticipation": 0.5, "hope": 0.3, "arousal": 0.3},
+        "support": {"gratitude": 0.5, "trust": 0.4, "valence": 0.3},
+        "rejection": {"shame": 0.4, "sadness": 0.3, "valence": -0.4},
+        "success": {"pride": 0.6, "joy": 0.5, "valence": 0.5},
+        "failure": {"sadness": 0.6, "shame": 0.3, "valence": -0.5},
+        "surprise": {"surprise": 0.7, "arousal": 0.4},
+    }
+
+    # 人格特质关键词
+    PERSONALITY_TRAIT_KEYWORDS = {
+        "optimistic": ("optimistic", "positive", "hopeful"),      # 乐观主义者
+        "pessimistic": ("pessimistic", "negative", "cynical"),    # 悲观主义者
+        "confident": ("confident", "assertive", "bold"),          # 自信者
+        "shy": ("shy", "timid", "introverted"),                   # 害羞者
+        "extroverted": ("extroverted", "outgoing", "sociable"),   # 外向者
+        "introverted": ("introverted", "reserved", "quiet"),      # 内向者
+    }
+
+    # 人格特质对各情绪维度的影响（与 PERSONALITY_TRAIT_KEYWORDS 同序）
+    PERSONALITY_TRAIT_EFFECTS = {
+        "optimistic": {"valence": 0.3, "optimism": 0.4, "hope": 0.3},
+        "pessimistic": {"valence": -0.3, "optimism": -0.4, "anxiety": 0.2},
+        "confident": {"dominance": 0.3, "pride": 0.2},
+        "shy": {"dominance": -0.3, "shame": 0.2, "arousal": -0.2},
+        "extroverted": {"arousal": 0.2, "anticipation": 0.2},
+        "introverted": {"arousal": -0.2},
+    }
+    _TRAIT_DELTAS: np.ndarray = _effects_matrix(PERSONALITY_TRAIT_KEYWORDS, PERSONALITY_TRAIT_EFFECTS)
+
+    # 情绪稳定性调整：(特质关键词, 稳定性增量)，按顺序累加
+    STABILITY_ADJUSTMENTS = (
+        (("stable", "calm", "steady", "reliable"), 0.2),           # 情绪稳定特质
+        (("volatile", "moody", "unstable", "emotional"), -0.2),    # 情绪不稳定特质
+        (("introverted", "reserved", "thoughtful"), 0.1),          # 内向者通常更情绪稳定
+        (("extroverted", "outgoing", "energetic"), -0.05),         # 外向者反应性更高，轻微降低稳定性
+    )
+
+    # 人格描述中需要检测的全部关键词（特质 + 稳定性，去重后保持顺序）
+    _DESCRIPTION_WORDS: Tuple[str, ...] = tuple(dict.fromkeys(
+        [word for keywords in PERSONALITY_TRAIT_KEYWORDS.values() for word in keywords]
+        + [word for keywords, _ in STABILITY_ADJUSTMENTS for word in keywords]
+    ))
+
+    _DESCRIPTION_RE, _DESCRIPTION_COVERS = _compile_keyword_scanner({"description": _DESCRIPTION_WORDS})
+
+    # 所有关键词编译为一个正则，上下文只需扫描一遍
+    _KEYWORD_RE, _KEYWORD_COVERS = _compile_keyword_scanner(POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS, SITUATION_KEYWORDS)
     
     @classmethod
     def generate_from_template(cls, template_name: str, variation: float = 0.2, context: str = "") -> EmotionProfile:
         """从模板生成情绪，添加随机变化和上下文信息"""
-        if template_name not in cls.EMOTION_TEMPLATES:
-            template_name = "neutral"
-        
-        base = cls.EMOTION_TEMPLATES[template_name]
+        # 一次查表取得模板行号，未知模板回退到 neutral
+        row = cls._TEMPLATE_INDEX.get(template_name, cls._NEUTRAL_ROW)
         
-        # 添加随机变化
-        new_emotion = EmotionProfile(
-            valence=base.valence + random.uniform(-variation, variation),
-            arousal=base.arousal + random.uniform(-variation, variation),
-            dominance=base.dominance + random.uniform(-variation, variation),
-            joy=base.joy + random.uniform(-variation, variation),
-            sadness=base.sadness + random.uniform(-variation, variation),
-            anger=base.anger + random.uniform(-variation, variation),
-            fear=base.fear + random.uniform(-variation, variation),
-            surprise=base.surprise + random.uniform(-variation, variation),
-            disgust=base.disgust + random.uniform(-variation, variation),
-            trust=base.trust + random.uniform(-variation, variation),
-            anticipation=base.anticipation + random.uniform(-variation, variation),
-            optimism=base.optimism + random.uniform(-variation, variation),
-            anxiety=base.anxiety + random.uniform(-variation, variation),
-            guilt=base.guilt + random.uniform(-variation, variation),
-            pride=base.pride + random.uniform(-variation, variation),
-            shame=base.shame + random.uniform(-variation, variation),
-            envy=base.envy + random.uniform(-variation, variation),
-            gratitude=base.gratitude + random.uniform(-variation, variation),
-            hope=base.hope + random.uniform(-variation, variation),
-            context=context or base.context
-        )
-
-        return new_emotion
+        # 模板行 + 一次性抽取的 19 维随机变化
+        vec = cls._TEMPLATE_MATRIX[row] + cls._RNG.uniform(-variation, variation, _N_DIMS)
+        return EmotionProfile.from_vec(vec, context=context or cls._TEMPLATE_CONTEXTS[row])
     
     @classmethod
     def generate_from_context(cls, context: str, personality: Dict[str, Any]) -> EmotionProfile:
@@ -498,130 +658,63 @@ class EmotionGenerator:
 
         return combined_emotions
 
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _description_hits(description: str) -> FrozenSet[str]:
+        """人格描述中出现的关键词：只小写一次、用预编译正则扫描一遍，特质与稳定性分析共用；
+        同一 agent 的描述每个 tick 都相同，结果按描述缓存"""
+        covers = EmotionGenerator._DESCRIPTION_COVERS
+        found: Set[str] = set()
+        for match in EmotionGenerator._DESCRIPTION_RE.finditer(description.lower()):
+            found |= covers[match.group(1)]
+        return frozenset(found)
+
     @classmethod
     def _analyze_personality_traits(cls, personality: Dict[str, Any]) -> EmotionProfile:
-        """分析人格特质对情绪的影响"""
-        base_emotion = EmotionProfile(context="personality baseline")
-
-        description = personality.get("description", "").lower()
-
-        # 乐观主义者
-        if any(word in description for word in ["optimistic", "positive", "hopeful"]):
-            base_emotion.valence += 0.3
-            base_emotion.optimism += 0.4
-            base_emotion.hope += 0.3
-
-        # 悲观主义者
-        if any(word in description for word in ["pessimistic", "negative", "cynical"]):
-            base_emotion.valence -= 0.3
-            base_emotion.optimism -= 0.4
-            base_emotion.anxiety += 0.2
+        """分析人格特质对情绪的影响（命中的特质按顺序累加各自的增量行）"""
+        hits = cls._description_hits(personality.get("description", ""))
 
-        # 自信者
-        if any(word in description for word in ["confident", "assertive", "bold"]):
-            base_emotion.dominance += 0.3
-            base_emotion.pride += 0.2
+        delta = np.zeros(_N_DIMS, dtype=np.float64)
+        for keywords, row in zip(cls.PERSONALITY_TRAIT_KEYWORDS.values(), cls._TRAIT_DELTAS):
+            if not hits.isdisjoint(keywords):
+                delta += row
 
-        # 害羞者
-        if any(word in description for word in ["shy", "timid", "introverted"]):
-            base_emotion.dominance -= 0.3
-            base_emotion.shame += 0.2
-            base_emotion.arousal -= 0.2
-
-        # 外向者
-        if any(word in description for word in ["extroverted", "outgoing", "sociable"]):
-            base_emotion.arousal += 0.2
-            base_emotion.anticipation += 0.2
-
-        # 内向者
-        if any(word in description for word in ["introverted", "reserved", "quiet"]):
-            base_emotion.arousal -= 0.2
-
-        return base_emotion
+        return EmotionProfile.from_vec(delta, context="personality baseline")
 
     @classmethod
     def _analyze_context_emotions(cls, context: str) -> EmotionProfile:
         """分析上下文中的情绪关键词（支持中英文）"""
         emotion = EmotionProfile(context=f"context: {context}")
+        v = emotion.vec
 
-        context_lower = context.lower()
-
-        # 积极情绪关键词
-        positive_keywords = {
-            "joy": ["happy", "joy", "delighted", "pleased", "satisfied"],
-            "gratitude": ["thankful", "grateful", "appreciative"],
-            "pride": ["proud", "accomplished", "successful"],
-            "hope": ["hopeful", "optimistic", "looking forward"],
-            "trust": ["trust", "reliable", "dependable"],
-            "love": ["love", "affection", "care"]
-        }
-
-        # 消极情绪关键词
-        negative_keywords = {
-            "sadness": ["sad", "unhappy", "depressed", "melancholy", "sorrow"],
-            "anger": ["angry", "mad", "frustrated", "irritated", "annoyed"],
-            "fear": ["scared", "frightened", "terrified", "afraid", "worried"],
-            "disgust": ["disgusted", "repelled", "revolted", "grossed out"],
-            "shame": ["ashamed", "embarrassed", "humiliated"],
-            "guilt": ["guilty", "remorseful", "regretful"],
-            "envy": ["envious", "jealous", "covetous"],
-            "anxiety": ["anxious", "nervous", "worried", "stressed"]
-        }
-
-        # 情境关键词（含中文）
-        situation_keywords = {
-            "threat": ["threat", "danger", "risk", "menace", "hazard", "威胁", "危险"],
-            "challenge": ["challenge", "obstacle", "difficulty", "problem", "挑战", "困难"],
-            "support": ["support", "help", "assistance", "aid", "支持", "帮助"],
-            "rejection": ["rejected", "ignored", "excluded", "dismissed", "拒绝", "忽视"],
-            "success": ["success", "achievement", "victory", "triumph", "成功", "胜利"],
-            "failure": ["failure", "defeat", "loss", "disappointment", "失败", "挫败"],
-            "surprise": ["surprise", "unexpected", "sudden", "shocking", "惊讶", "意外"]
-        }
+        # 一次扫描得到上下文中出现的全部关键词
+        found: Set[str] = set()
+        for match in cls._KEYWORD_RE.finditer(context.lower()):
+            found |= cls._KEYWORD_COVERS[match.group(1)]
+        if not found:
+            return emotion
+        # 以下直接改写 vec，可能越界（由合并时的归一化处理）
+        emotion._mark_modified()
 
         # 分析情绪关键词
-        for emotion_type, keywords in positive_keywords.items():
-            if any(word in context_lower for word in keywords):
-                intensity = sum(1 for word in keywords if word in context_lower) / len(keywords)
-                setattr(emotion, emotion_type, min(0.8, emotion.joy + intensity * 0.8))
-
-        for emotion_type, keywords in negative_keywords.items():
-            if any(word in context_lower for word in keywords):
-                intensity = sum(1 for word in keywords if word in context_lower) / len(keywords)
-                current_value = getattr(emotion, emotion_type, 0)
-                setattr(emotion, emotion_type, min(1.0, current_value + intensity * 0.8))
+        for emotion_type, keywords in cls.POSITIVE_KEYWORDS.items():
+            hits = sum(1 for word in keywords if word in found)
+            if hits and emotion_type in _DIM_INDEX:
+                intensity = hits / len(keywords)
+                v[_DIM_INDEX[emotion_type]] = min(0.8, v[_DIM_INDEX["joy"]] + intensity * 0.8)
+
+        for emotion_type, keywords in cls.NEGATIVE_KEYWORDS.items():
+            hits = sum(1 for word in keywords if word in found)
+            if hits:
+                intensity = hits / len(keywords)
+                idx = _DIM_INDEX[emotion_type]
+                v[idx] = min(1.0, v[idx] + intensity * 0.8)
 
         # 分析情境影响
-        for situation, keywords in situation_keywords.items():
-            if any(word in context_lower for word in keywords):
-                if situation == "threat":
-                    emotion.fear += 0.6
-                    emotion.anxiety += 0.4
-                    emotion.valence -= 0.4
-                    emotion.arousal += 0.5
-                elif situation == "challenge":
-                    emotion.anticipation += 0.5
-                    emotion.hope += 0.3
-                    emotion.arousal += 0.3
-                elif situation == "support":
-                    emotion.gratitude += 0.5
-                    emotion.trust += 0.4
-                    emotion.valence += 0.3
-                elif situation == "rejection":
-                    emotion.shame += 0.4
-                    emotion.sadness += 0.3
-                    emotion.valence -= 0.4
-                elif situation == "success":
-                    emotion.pride += 0.6
-                    emotion.joy += 0.5
-                    emotion.valence += 0.5
-                elif situation == "failure":
-                    emotion.sadness += 0.6
-                    emotion.shame += 0.3
-                    emotion.valence -= 0.5
-                elif situation == "surprise":
-                    emotion.surprise += 0.7
-                    emotion.arousal += 0.4
+        for situation, keywords in cls.SITUATION_KEYWORDS.items():
+            if any(word in found for word in keywords):
+                for dim, delta in cls.SITUATION_EFFECTS[situation].items():
+                    v[_DIM_INDEX[dim]] += delta
         
         return emotion
     
@@ -632,27 +725,10 @@ class EmotionGenerator:
         personality_weight = 0.4
         context_weight = 0.6
 
-        combined = EmotionProfile(
-            valence=personality.valence * personality_weight + context.valence * context_weight,
-            arousal=personality.arousal * personality_weight + context.arousal * context_weight,
-            dominance=personality.dominance * personality_weight + context.dominance * context_weight,
-            joy=personality.joy * personality_weight + context.joy * context_weight,
-            sadness=personality.sadness * personality_weight + context.sadness * context_weight,
-            anger=personality.anger * personality_weight + context.anger * context_weight,
-            fear=personality.fear * personality_weight + context.fear * context_weight,
-            surprise=personality.surprise * personality_weight + context.surprise * context_weight,
-            disgust=personality.disgust * personality_weight + context.disgust * context_weight,
-            trust=personality.trust * personality_weight + context.trust * context_weight,
-            anticipation=personality.anticipation * personality_weight + context.anticipation * context_weight,
-            optimism=personality.optimism * personality_weight + context.optimism * context_weight,
-            anxiety=personality.anxiety * personality_weight + context.anxiety * context_weight,
-            guilt=personality.guilt * personality_weight + context.guilt * context_weight,
-            pride=personality.pride * personality_weight + context.pride * context_weight,
-            shame=personality.shame * personality_weight + context.shame * context_weight,
-            envy=personality.envy * personality_weight + context.envy * context_weight,
-            gratitude=personality.gratitude * personality_weight + context.gratitude * context_weight,
-            hope=personality.hope * personality_weight + context.hope * context_weight,
-            context=f"personality + context: {context_str}"
+        combined = EmotionProfile.from_vec(
+            _blend(personality.vec, personality_weight, context.vec, context_weight),
+            context=f"personality + context: {context_str}",
+            normalized=personality._normalized and context._normalized
         )
 
         return combined
@@ -664,199 +740,211 @@ class EmotionGenerator:
         # 获取上下文影响
         context_emotion = cls.generate_from_context(context, personality)
         
-        # 情绪稳定性参数（基于人格）
-        stability = cls._calculate_emotional_stability(personality)
-
-        # 时间衰减效应（情绪会随时间衰减）
-        decay_factor = 1.0 - time_decay
+        # 混合系数：由人格稳定性与时间衰减决定，同一 agent 每个 tick 都相同
+        alpha, beta = cls._blend_coefficients(personality.get("description", ""), time_decay)
 
         # 计算新情绪 (当前情绪 + 上下文影响，考虑稳定性)
-        new_emotion = EmotionProfile(
-            valence=current.valence * stability * decay_factor + context_emotion.valence * (1 - stability),
-            arousal=current.arousal * stability * decay_factor + context_emotion.arousal * (1 - stability),
-            dominance=current.dominance * stability * decay_factor + context_emotion.dominance * (1 - stability),
-            joy=current.joy * stability * decay_factor + context_emotion.joy * (1 - stability),
-            sadness=current.sadness * stability * decay_factor + context_emotion.sadness * (1 - stability),
-            anger=current.anger * stability * decay_factor + context_emotion.anger * (1 - stability),
-            fear=current.fear * stability * decay_factor + context_emotion.fear * (1 - stability),
-            surprise=current.surprise * stability * decay_factor + context_emotion.surprise * (1 - stability),
-            disgust=current.disgust * stability * decay_factor + context_emotion.disgust * (1 - stability),
-            trust=current.trust * stability * decay_factor + context_emotion.trust * (1 - stability),
-            anticipation=current.anticipation * stability * decay_factor + context_emotion.anticipation * (1 - stability),
-            optimism=current.optimism * stability * decay_factor + context_emotion.optimism * (1 - stability),
-            anxiety=current.anxiety * stability * decay_factor + context_emotion.anxiety * (1 - stability),
-            guilt=current.guilt * stability * decay_factor + context_emotion.guilt * (1 - stability),
-            pride=current.pride * stability * decay_factor + context_emotion.pride * (1 - stability),
-            shame=current.shame * stability * decay_factor + context_emotion.shame * (1 - stability),
-            envy=current.envy * stability * decay_factor + context_emotion.envy * (1 - stability),
-            gratitude=current.gratitude * stability * decay_factor + context_emotion.gratitude * (1 - stability),
-            hope=current.hope * stability * decay_factor + context_emotion.hope * (1 - stability),
-            context=f"evolved: {context}"
+        new_emotion = EmotionProfile.from_vec(
+            _blend(current.vec, alpha, context_emotion.vec, beta),
+            context=f"evolved: {context}",
+            # 系数非负且和不超过 1，取值范围包含 0，故已归一化输入的结果仍在范围内
+            normalized=current._normalized and context_emotion._normalized and 0.0 <= time_decay <= 1.0
         )
         
         return new_emotion
 
+    @classmethod
+    def evolve_batch(cls, current: EmotionBatch, contexts: List[str], personalities: List[Dict[str, Any]],
+                     time_decay: float = 0.1) -> EmotionBatch:
+        """批量版 evolve_emotion：第 i 行以 contexts[i]、personalities[i] 演化，整批在一个矩阵表达式中完成"""
+        n = len(current)
+        if len(contexts) != n or len(personalities) != n:
+            raise ValueError("contexts/personalities 数量必须与 current 行数一致")
+        if n == 0:
+            return EmotionBatch(np.empty((0, _N_DIMS), dtype=np.float64))
+
+        # 上下文影响与情绪稳定性（逐个 agent 分析文本，结果写入矩阵的对应行）
+        context_matrix = np.empty((n, _N_DIMS), dtype=np.float64)
+        for i, (context, personality) in enumerate(zip(contexts, personalities)):
+            context_matrix[i] = cls.generate_from_context(context, personality).vec
+        stability = np.fromiter(
+            (cls._calculate_emotional_stability(p) for p in personalities), dtype=np.float64, count=n
+        )
+
+        # 时间衰减效应
+        decay_factor = 1.0 - time_decay
+
+        new_matrix = cls.evolve_matrix(current.matrix, context_matrix, stability, decay_factor)
+        batch = EmotionBatch(new_matrix, contexts=[f"evolved: {c}" for c in contexts])
+        batch.normalize()
+        return batch
+
+    @staticmethod
+    def evolve_matrix(current: np.ndarray, context: np.ndarray, stability: np.ndarray,
+                      decay_factor: float) -> np.ndarray:
+        """数组层面的演化核心：current、context 为 (N, 19)，stability 为 (N,)；
+        返回未裁剪的新矩阵 current * stability * decay_factor + context * (1 - stability)"""
+        stability = np.asarray(stability, dtype=np.float64)[:, None]
+        return _blend(current, stability * decay_factor, context, 1 - stability)
+
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _blend_coefficients(description: str, time_decay: float) -> Tuple[float, float]:
+        """evolve_emotion 的混合系数 (alpha, beta)：新情绪 = 当前 * alpha + 上下文 * beta，
+        其中 alpha = 稳定性 * (1 - 时间衰减)，beta = 1 - 稳定性；按 (人格描述, 衰减) 缓存"""
+        stability = EmotionGenerator._stability_for(description)
+        return stability * (1.0 - time_decay), 1 - stability
+
     @classmethod
     def _calculate_emotional_stability(cls, personality: Dict[str, Any]) -> float:
         """计算情绪稳定性（基于人格特质）"""
-        description = personality.get("description", "").lower()
+        return cls._stability_for(personality.get("description", ""))
 
-        base_stability = 0.7  # 默认中等稳定性
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _stability_for(description: str) -> float:
+        """按人格描述缓存的情绪稳定性"""
+        hits = EmotionGenerator._description_hits(description)
 
-        # 情绪稳定特质
-        if any(word in description for word in ["stable", "calm", "steady", "reliable"]):
-            base_stability += 0.2
+        base_stability = 0.7  # 默认中等稳定性
 
-        # 情绪不稳定特质
-        if any(word in description for word in ["volatile", "moody", "unstable", "emotional"]):
-            base_stability -= 0.2
+        for keywords, delta in EmotionGenerator.STABILITY_ADJUSTMENTS:
+            if not hits.isdisjoint(keywords):
+                base_stability += delta
 
-        # 内向者通常更情绪稳定
-        if any(word in description for word in ["introverted", "reserved", "thoughtful"]):
-            base_stability += 0.1
+        return max(0.3, min(0.9, base_stability))  # 限制在合理范围内
 
-        # 外向者通常更情绪活跃但不一定不稳定
-        if any(word in description for word in ["extroverted", "outgoing", "energetic"]):
-            base_stability -= 0.05  # 轻微降低稳定性以反映更高的反应性
 
-        return max(0.3, min(0.9, base_stability))  # 限制在合理范围内
+# 传统 mood 字符串 → 情绪模板名（包含新情绪）
+_MOOD_MAPPING: Dict[str, str] = {
+    # 原有映射
+    "calm": "calm",
+    "neutral": "neutral",
+    "curious": "excited",
+    "anxious": "anxious",
+    "worried": "anxious",
+    "nervous": "anxious",
+    "angry": "angry",
+    "mad": "angry",
+    "frustrated": "angry",
+    "sad": "sad",
+    "depressed": "sad",
+    "melancholy": "sad",
+    "happy": "excited",
+    "joyful": "excited",
+    "cheerful": "excited",
+    "excited": "excited",
+    "fearful": "fearful",
+    "scared": "fearful",
+    "terrified": "fearful",
+    "surprised": "surprised",
+    "shocked": "surprised",
+    "confident": "confident",
+    "suspicious": "suspicious",
+
+    # 新增情绪映射
+    "hopeful": "hopeful",
+    "hopeless": "sad",
+    "proud": "proud",
+    "ashamed": "guilty",
+    "guilty": "guilty",
+    "envious": "envious",
+    "jealous": "envious",
+    "grateful": "grateful",
+    "thankful": "grateful",
+    "trusting": "trusting",
+    "distrustful": "suspicious",
+    "shy": "shy",
+    "threatened": "threatened",
+    "challenged": "challenged",
+    "supported": "supported",
+    "ignored": "ignored",
+    "disgusted": "disgusted",
+    "repelled": "disgusted",
+    "optimistic": "hopeful",
+    "pessimistic": "sad",
+    "embarrassed": "guilty",
+    "humiliated": "guilty",
+    "confused": "surprised",
+    "amazed": "surprised",
+    "ecstatic": "excited",
+    "devastated": "sad",
+    "furious": "angry",
+    "panicked": "fearful",
+    "content": "calm",
+    "satisfied": "calm",
+    "relaxed": "calm",
+    "peaceful": "calm",
+    "agitated": "anxious",
+    "restless": "anxious",
+    "tense": "anxious",
+    "stressed": "anxious",
+    "overwhelmed": "anxious",
+    "bitter": "angry",
+    "indignant": "angry",
+    "heartbroken": "sad",
+    "miserable": "sad",
+    "despairing": "sad",
+    "petrified": "fearful",
+    "horrified": "fearful",
+    "apprehensive": "anxious",
+    "uneasy": "anxious",
+    "insecure": "anxious",
+    "vulnerable": "fearful",
+    "exposed": "fearful",
+    "intimidated": "fearful",
+    "bullied": "threatened",
+    "victimized": "threatened",
+    "betrayed": "threatened",
+    "loved": "excited",
+    "cherished": "grateful",
+    "valued": "proud",
+    "respected": "proud",
+    "admired": "proud",
+    "included": "supported",
+    "welcomed": "supported",
+    "accepted": "supported",
+    "rejected": "ignored",
+    "excluded": "ignored",
+    "isolated": "ignored",
+    "abandoned": "ignored",
+    "lonely": "sad",
+    "nostalgic": "sad",
+    "sentimental": "grateful",
+    "accomplished": "proud",
+    "successful": "proud",
+    "victorious": "proud",
+    "defeated": "sad",
+    "regretful": "guilty",
+    "remorseful": "guilty",
+    "covetous": "envious",
+    "resentful": "envious",
+    "dissatisfied": "envious",
+    "appreciative": "grateful",
+    "indebted": "grateful",
+    "obliged": "grateful",
+    "faithful": "trusting",
+    "loyal": "trusting",
+    "devoted": "trusting",
+    "skeptical": "suspicious",
+    "doubtful": "suspicious",
+    "wary": "suspicious",
+    "timid": "shy",
+    "bashful": "shy",
+    "reserved": "shy",
+    "motivated": "challenged",
+    "inspired": "hopeful",
+    "encouraged": "supported",
+    "discouraged": "sad",
+    "disheartened": "sad",
+    "demotivated": "ignored"
+}
 
 
 def parse_legacy_mood(mood_str: str) -> EmotionProfile:
     """解析传统的mood字符串为情绪画像，支持新情绪模型"""
     mood_lower = mood_str.lower().strip()
-    
-    # 扩展的情绪映射（包含新情绪）
-    mood_mapping = {
-        # 原有映射
-        "calm": "calm",
-        "neutral": "neutral", 
-        "curious": "excited",
-        "anxious": "anxious",
-        "worried": "anxious",
-        "nervous": "anxious",
-        "angry": "angry",
-        "mad": "angry",
-        "frustrated": "angry",
-        "sad": "sad",
-        "depressed": "sad",
-        "melancholy": "sad",
-        "happy": "excited",
-        "joyful": "excited",
-        "cheerful": "excited",
-        "excited": "excited",
-        "fearful": "fearful",
-        "scared": "fearful",
-        "terrified": "fearful",
-        "surprised": "surprised",
-        "shocked": "surprised",
-        "confident": "confident",
-        "suspicious": "suspicious",
-
-        # 新增情绪映射
-        "hopeful": "hopeful",
-        "hopeless": "sad",
-        "proud": "proud",
-        "ashamed": "guilty",
-        "guilty": "guilty",
-        "envious": "envious",
-        "jealous": "envious",
-        "grateful": "grateful",
-        "thankful": "grateful",
-        "trusting": "trusting",
-        "distrustful": "suspicious",
-        "shy": "shy",
-        "threatened": "threatened",
-        "challenged": "challenged",
-        "supported": "supported",
-        "ignored": "ignored",
-        "disgusted": "disgusted",
-        "repelled": "disgusted",
-        "optimistic": "hopeful",
-        "pessimistic": "sad",
-        "embarrassed": "guilty",
-        "humiliated": "guilty",
-        "confused": "surprised",
-        "amazed": "surprised",
-        "shocked": "surprised",
-        "ecstatic": "excited",
-        "devastated": "sad",
-        "furious": "angry",
-        "terrified": "fearful",
-        "panicked": "fearful",
-        "content": "calm",
-        "satisfied": "calm",
-        "relaxed": "calm",
-        "peaceful": "calm",
-        "agitated": "anxious",
-        "restless": "anxious",
-        "tense": "anxious",
-        "stressed": "anxious",
-        "overwhelmed": "anxious",
-        "bitter": "angry",
-        "resentful": "angry",
-        "indignant": "angry",
-        "heartbroken": "sad",
-        "miserable": "sad",
-        "despairing": "sad",
-        "petrified": "fearful",
-        "horrified": "fearful",
-        "apprehensive": "anxious",
-        "uneasy": "anxious",
-        "insecure": "anxious",
-        "vulnerable": "fearful",
-        "exposed": "fearful",
-        "intimidated": "fearful",
-        "bullied": "threatened",
-        "victimized": "threatened",
-        "betrayed": "threatened",
-        "loved": "excited",
-        "cherished": "grateful",
-        "valued": "proud",
-        "respected": "proud",
-        "admired": "proud",
-        "included": "supported",
-        "welcomed": "supported",
-        "accepted": "supported",
-        "rejected": "ignored",
-        "excluded": "ignored",
-        "isolated": "ignored",
-        "abandoned": "ignored",
-        "lonely": "sad",
-        "nostalgic": "sad",
-        "sentimental": "grateful",
-        "accomplished": "proud",
-        "successful": "proud",
-        "victorious": "proud",
-        "defeated": "sad",
-        "humiliated": "guilty",
-        "embarrassed": "guilty",
-        "regretful": "guilty",
-        "remorseful": "guilty",
-        "covetous": "envious",
-        "resentful": "envious",
-        "dissatisfied": "envious",
-        "appreciative": "grateful",
-        "indebted": "grateful",
-        "obliged": "grateful",
-        "faithful": "trusting",
-        "loyal": "trusting",
-        "devoted": "trusting",
-        "skeptical": "suspicious",
-        "doubtful": "suspicious",
-        "wary": "suspicious",
-        "timid": "shy",
-        "bashful": "shy",
-        "reserved": "shy",
-        "motivated": "challenged",
-        "inspired": "hopeful",
-        "encouraged": "supported",
-        "discouraged": "sad",
-        "disheartened": "sad",
-        "demotivated": "ignored"
-    }
-    
-    template_name = mood_mapping.get(mood_lower, "neutral")
+    template_name = _MOOD_MAPPING.get(mood_lower, "neutral")
     return EmotionGenerator.generate_from_template(template_name, context=f"legacy mood: {mood_str}")
 
 
@@ -867,26 +955,20 @@ def create_emotion_summary(emotion: EmotionProfile) -> str:
     # 创建详细的情绪摘要
     summary_parts = [description]
 
-    # 添加PAD维度信息
-    pad_info = []
-    if abs(emotion.valence) > 0.2:
-        pad_info.append(f"valence: {emotion.valence:+.2f}")
-    if abs(emotion.arousal) > 0.2:
-        pad_info.append(f"arousal: {emotion.arousal:+.2f}")
-    if abs(emotion.dominance) > 0.2:
-        pad_info.append(f"dominance: {emotion.dominance:+.2f}")
+    names = EmotionProfile.DIMENSIONS
 
+    # 添加PAD维度信息（绝对值大于0.2的）
+    pad_info = [
+        f"{name}: {value:+.2f}" for name, value in zip(names[:3], emotion.vec[:3].tolist()) if abs(value) > 0.2
+    ]
     if pad_info:
         summary_parts.append(f"({', '.join(pad_info)})")
 
-    # 添加主要情绪维度（强度大于0.3的）
-    significant_emotions = []
-    for dim_name, value in emotion.to_dict().items():
-        if dim_name in ["joy", "sadness", "anger", "fear", "surprise", "disgust",
-                       "trust", "anticipation", "optimism", "anxiety", "guilt",
-                       "pride", "shame", "envy", "gratitude", "hope"]:
-            if abs(value) > 0.3:
-                significant_emotions.append(f"{dim_name}: {value:+.2f}")
+    # 添加主要情绪维度（强度大于0.3的；与 to_dict 一致先保留三位小数再判断）
+    significant_emotions = [
+        f"{name}: {value:+.2f}"
+        for name, value in zip(names[3:], [round(v, 3) for v in emotion.vec[3:].tolist()]) if abs(value) > 0.3
+    ]
 
     if significant_emotions:
         summary_parts.append(f"[{' '.join(significant_emotions)}]")
@@ -914,60 +996,57 @@ def analyze_emotion_dynamics(emotions: List[EmotionProfile]) -> Dict[str, Any]:
         "mood_shifts": []
     }
 
-    # 计算情绪趋势
-    all_dimensions = set()
-    for emotion in emotions:
-        all_dimensions.update(emotion.to_dict().keys())
-
-    for dim in all_dimensions:
-        if dim in ["timestamp", "context", "intensity"]:
-            continue
-
-        values = [getattr(e, dim, 0) for e in emotions]
-        analysis["emotion_trends"][dim] = {
-            "start": values[0],
-            "end": values[-1],
-            "change": values[-1] - values[0],
-            "volatility": np.std(values) if len(values) > 1 else 0
-        }
+    # 计算情绪趋势：堆叠为 (M, D+1) 矩阵，最后一列为强度
+    mat = np.empty((len(emotions), _N_DIMS + 1))
+    for row, emotion in zip(mat, emotions):
+        row[:_N_DIMS] = emotion.vec
+        row[_N_DIMS] = emotion.intensity
+    change = mat[-1] - mat[0]
+    volatility = mat.std(axis=0)
+
+    analysis["emotion_trends"] = {
+        dim: {"start": start, "end": end, "change": delta, "volatility": vol}
+        for dim, start, end, delta, vol in zip(
+            EmotionProfile.DIMENSIONS, mat[0].tolist(), mat[-1].tolist(), change.tolist(), volatility.tolist()
+        )
+    }
 
     # 计算稳定性指标
-    pad_values = [[e.valence, e.arousal, e.dominance] for e in emotions]
-    pad_stability = 1 - np.mean([np.std([v[i] for v in pad_values]) for i in range(3)])
-
     analysis["stability_metrics"] = {
-        "pad_stability": pad_stability,
-        "overall_intensity_trend": analysis["emotion_trends"]["intensity"]["change"] if "intensity" in analysis["emotion_trends"] else 0
+        "pad_stability": 1 - float(volatility[:3].mean()),
+        "overall_intensity_trend": float(change[_N_DIMS])
     }
 
     # 识别主要情绪
-    dominant_counts = {}
-    for emotion in emotions:
-        primary = emotion.get_primary_emotion()
-        dominant_counts[primary] = dominant_counts.get(primary, 0) + 1
-
-    analysis["dominant_emotions"] = dict(sorted(dominant_counts.items(), key=lambda x: x[1], reverse=True)[:3])
+    primaries = [e.get_primary_emotion() for e in emotions]
+    dominant_counts = Counter(primaries)
+
+    # 稳定降序排序：次数相同时保持首次出现的顺序
+    labels = list(dominant_counts)
+    counts = np.fromiter(dominant_counts.values(), dtype=np.int64, count=len(labels))
+    analysis["dominant_emotions"] = {
+        labels[i]: int(counts[i]) for i in np.argsort(-counts, kind="stable")[:3].tolist()
+    }
 
     # 检测情绪转变点
-    for i in range(1, len(emotions)):
-        prev_emotion = emotions[i-1]
-        curr_emotion = emotions[i]
-
-        # 计算情绪变化幅度
-        change_magnitude = abs(curr_emotion.valence - prev_emotion.valence) + abs(curr_emotion.arousal - prev_emotion.arousal)
-
-        if change_magnitude > 0.5:  # 显著变化阈值
-            analysis["mood_shifts"].append({
-                "from_tick": i-1,
-                "to_tick": i,
-                "change_magnitude": change_magnitude,
-                "from_emotion": prev_emotion.get_primary_emotion(),
-                "to_emotion": curr_emotion.get_primary_emotion()
-            })
+    magnitudes = np.abs(np.diff(mat[:, 0])) + np.abs(np.diff(mat[:, 1]))
+    for i in np.flatnonzero(magnitudes > 0.5).tolist():  # 显著变化阈值
+        analysis["mood_shifts"].append({
+            "from_tick": i,
+            "to_tick": i + 1,
+            "change_magnitude": float(magnitudes[i]),
+            "from_emotion": primaries[i],
+            "to_emotion": primaries[i + 1]
+        })
 
     return analysis
 
 
+# 情绪热力图：valence/arousal 各 20 格，覆盖 [-1, 1]
+_HEATMAP_BINS = 20
+_HEATMAP_EDGES: np.ndarray = np.linspace(-1.0, 1.0, _HEATMAP_BINS + 1)
+
+
 class EmotionAnalytics:
     """情绪分析和可视化工具"""
 
@@ -978,20 +1057,22 @@ class EmotionAnalytics:
             return {"error": "No emotion data provided"}
 
         # 提取PAD维度数据
-        valence_data = [e.valence for e in emotions]
-        arousal_data = [e.arousal for e in emotions]
-
-        # 创建二维直方图
-        heatmap, xedges, yedges = np.histogram2d(
-            valence_data, arousal_data,
-            bins=[20, 20],
-            range=[[-1, 1], [-1, 1]]
-        )
+        pad = np.array([e.vec[:2] for e in emotions])
+
+        # 二维直方图：按 np.histogram2d 的规则定位格子（左闭右开，最后一格含右端点，范围外丢弃），
+        # 再用 bincount 一次累加
+        edges = _HEATMAP_EDGES
+        idx = np.searchsorted(edges, pad, side="right")
+        idx[pad == edges[-1]] -= 1
+        idx -= 1
+        inside = ((idx >= 0) & (idx < _HEATMAP_BINS)).all(axis=1)
+        flat = idx[inside, 0] * _HEATMAP_BINS + idx[inside, 1]
+        heatmap = np.bincount(flat, minlength=_HEATMAP_BINS * _HEATMAP_BINS).reshape(_HEATMAP_BINS, _HEATMAP_BINS)
 
         return {
-            "heatmap": heatmap.tolist(),
-            "xedges": xedges.tolist(),
-            "yedges": yedges.tolist(),
+            "heatmap": heatmap.astype(np.float64).tolist(),
+            "xedges": edges.tolist(),
+            "yedges": edges.tolist(),
             "xlabel": "Valence (愉悦度)",
             "ylabel": "Arousal (唤醒度)",
             "title": "情绪状态分布热力图"
@@ -1062,47 +1143,33 @@ class EmotionAnalytics:
                 "direction": "increasing" if trend > 0.01 else "decreasing" if trend < -0.01 else "stable"
             }
 
-        # 情绪稳定性分析
-        pad_values = [[e.valence, e.arousal, e.dominance] for e in emotions]
-        stability_scores = []
-
-        for i in range(1, len(pad_values)):
-            prev = np.array(pad_values[i-1])
-            curr = np.array(pad_values[i])
-            stability = 1 - np.linalg.norm(curr - prev) / np.sqrt(3)
-            stability_scores.append(stability)
+        # 情绪稳定性分析：相邻样本 PAD 向量的距离一次算出
+        pad_mat = np.array([e.vec[:3] for e in emotions])
+        stability_scores = 1 - np.linalg.norm(np.diff(pad_mat, axis=0), axis=1) / _SQRT3
 
         analysis["stability_analysis"] = {
-            "average_stability": np.mean(stability_scores),
-            "stability_trend": np.polyfit(range(len(stability_scores)), stability_scores, 1)[0],
-            "most_stable_period": max(range(len(stability_scores)), key=lambda i: stability_scores[i]),
-            "least_stable_period": min(range(len(stability_scores)), key=lambda i: stability_scores[i])
+            "average_stability": float(stability_scores.mean()),
+            "stability_trend": np.polyfit(np.arange(len(stability_scores)), stability_scores, 1)[0],
+            "most_stable_period": int(stability_scores.argmax()),
+            "least_stable_period": int(stability_scores.argmin())
         }
 
-        # 情绪转变分析
-        transitions = []
-        for i in range(1, len(emotions)):
-            prev_primary = emotions[i-1].get_primary_emotion()
-            curr_primary = emotions[i].get_primary_emotion()
-
-            if prev_primary != curr_primary:
-                change_magnitude = abs(emotions[i].valence - emotions[i-1].valence) + abs(emotions[i].arousal - emotions[i-1].arousal)
-                transitions.append({
-                    "from": prev_primary,
-                    "to": curr_primary,
-                    "magnitude": change_magnitude,
-                    "step": i
-                })
-
-        # 找出最常见的转变
-        transition_counts = {}
-        for t in transitions:
-            key = f"{t['from']}->{t['to']}"
-            transition_counts[key] = transition_counts.get(key, 0) + 1
+        # 情绪转变分析：主要情绪只取一次，变化幅度由 valence/arousal 列差分得到
+        primaries = [e.get_primary_emotion() for e in emotions]
+        magnitudes = (np.abs(np.diff([e.vec[0] for e in emotions]))
+                      + np.abs(np.diff([e.vec[1] for e in emotions]))).tolist()
+        transitions = [
+            {"from": prev, "to": curr, "magnitude": magnitudes[i - 1], "step": i}
+            for i, (prev, curr) in enumerate(zip(primaries, primaries[1:]), start=1)
+            if prev != curr
+        ]
+
+        # 找出最常见的转变（次数相同时取最先出现的）
+        transition_counts = Counter(f"{t['from']}->{t['to']}" for t in transitions)
 
         analysis["mood_transitions"] = {
             "total_transitions": len(transitions),
-            "most_common_transition": max(transition_counts.items(), key=lambda x: x[1]) if transition_counts else None,
+            "most_common_transition": transition_counts.most_common(1)[0] if transition_counts else None,
             "transition_frequency": len(transitions) / (len(emotions) - 1),
             "significant_transitions": [t for t in transitions if t["magnitude"] > 0.5]
         }
@@ -1115,76 +1182,58 @@ class EmotionAnalytics:
         if not emotions:
             return "无情绪数据可供分析"
 
-        report = []
-        report.append(f"=== {agent_id} 情绪分析报告 ===")
-        report.append(f"分析样本数: {len(emotions)}")
-        report.append("")
-
-        # 总体情绪统计
-        avg_emotion = EmotionProfile()
-        for emotion in emotions:
-            avg_emotion.valence += emotion.valence
-            avg_emotion.arousal += emotion.arousal
-            avg_emotion.joy += emotion.joy
-            avg_emotion.sadness += emotion.sadness
-            avg_emotion.anger += emotion.anger
-            avg_emotion.fear += emotion.fear
-
         n = len(emotions)
-        avg_emotion.valence /= n
-        avg_emotion.arousal /= n
-        avg_emotion.joy /= n
-        avg_emotion.sadness /= n
-        avg_emotion.anger /= n
-        avg_emotion.fear /= n
-
-        report.append("总体情绪状态:")
-        report.append(f"  平均愉悦度: {avg_emotion.valence:+.3f}")
-        report.append(f"  平均唤醒度: {avg_emotion.arousal:+.3f}")
-        report.append(f"  平均快乐: {avg_emotion.joy:+.3f}")
-        report.append(f"  平均悲伤: {avg_emotion.sadness:+.3f}")
-        report.append(f"  平均愤怒: {avg_emotion.anger:+.3f}")
-        report.append(f"  平均恐惧: {avg_emotion.fear:+.3f}")
-        report.append("")
-
-        # 情绪分布
-        primary_emotions = [e.get_primary_emotion() for e in emotions]
-        emotion_counts = {}
-        for emotion in primary_emotions:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-
-        report.append("情绪分布:")
-        for emotion, count in sorted(emotion_counts.items(), key=lambda x: x[1], reverse=True):
-            percentage = (count / len(emotions)) * 100
-            report.append(f"  {emotion}: {count} 次 ({percentage:.1f}%)")
-        report.append("")
+        report = io.StringIO()
+        write = report.write
+        write(f"=== {agent_id} 情绪分析报告 ===\n分析样本数: {n}\n\n")
+
+        # 总体情绪统计：所有样本的 vec 堆叠后按列求均值
+        avg = np.mean([e.vec for e in emotions], axis=0)
+        write(
+            "总体情绪状态:\n"
+            f"  平均愉悦度: {avg[_DIM_INDEX['valence']]:+.3f}\n"
+            f"  平均唤醒度: {avg[_DIM_INDEX['arousal']]:+.3f}\n"
+            f"  平均快乐: {avg[_DIM_INDEX['joy']]:+.3f}\n"
+            f"  平均悲伤: {avg[_DIM_INDEX['sadness']]:+.3f}\n"
+            f"  平均愤怒: {avg[_DIM_INDEX['anger']]:+.3f}\n"
+            f"  平均恐惧: {avg[_DIM_INDEX['fear']]:+.3f}\n\n"
+        )
+
+        # 情绪分布（most_common 为稳定排序，次数相同时保持首次出现的顺序）
+        emotion_counts = Counter(e.get_primary_emotion() for e in emotions)
+
+        write("情绪分布:\n")
+        for emotion, count in emotion_counts.most_common():
+            write(f"  {emotion}: {count} 次 ({count / n * 100:.1f}%)\n")
+        write("\n")
 
         # 情绪动态分析
-        if len(emotions) >= 3:
+        if n >= 3:
             patterns = EmotionAnalytics.analyze_emotion_patterns(emotions)
 
-            report.append("情绪动态分析:")
+            write("情绪动态分析:\n")
             for dim, trend in patterns["overall_trends"].items():
                 if trend["slope"] > 0.01:
-                    report.append(f"  {dim}: 呈上升趋势")
+                    write(f"  {dim}: 呈上升趋势\n")
                 elif trend["slope"] < -0.01:
-                    report.append(f"  {dim}: 呈下降趋势")
+                    write(f"  {dim}: 呈下降趋势\n")
                 else:
-                    report.append(f"  {dim}: 相对稳定")
+                    write(f"  {dim}: 相对稳定\n")
 
             stability = patterns["stability_analysis"]["average_stability"]
-            report.append(f"  情绪稳定性: {stability:.3f} ({'高' if stability > 0.7 else '中' if stability > 0.4 else '低'})")
-            report.append("")
+            write(f"  情绪稳定性: {stability:.3f} ({'高' if stability > 0.7 else '中' if stability > 0.4 else '低'})\n\n")
 
         # 当前情绪状态
         current_emotion = emotions[-1]
-        report.append("当前情绪状态:")
-        report.append(f"  主要情绪: {current_emotion.get_primary_emotion()}")
-        report.append(f"  情绪描述: {current_emotion.get_mood_description()}")
-        report.append(f"  情绪强度: {current_emotion.intensity:.3f}")
-        report.append(f"  情绪象限: {current_emotion.get_emotion_quadrant()}")
+        write(
+            "当前情绪状态:\n"
+            f"  主要情绪: {current_emotion.get_primary_emotion()}\n"
+            f"  情绪描述: {current_emotion.get_mood_description()}\n"
+            f"  情绪强度: {current_emotion.intensity:.3f}\n"
+            f"  情绪象限: {current_emotion.get_emotion_quadrant()}"
+        )
 
-        return "\n".join(report)
+        return report.getvalue()
 
 
 # 演示函数：展示新的情绪系统功能
@@ -29,6 +29,7 @@ async def generate_env_from_hint(hint: str, temperature: float = 0.4) -> EnvSpec
         ],
         temperature=temperature,
         max_tokens=700,
+        json_object=True,
     )
     title = data.get("title") or "Generated Environment"
     prompt = data.get("prompt") or ""
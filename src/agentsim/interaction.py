@@ -1,5 +1,6 @@
 import json
-from typing import Dict, List, Any, Set
+from functools import lru_cache
+from typing import Dict, List, Any, Sequence, Set, Tuple
 from .llm import chat_json
 from .models import AgentTickOutput, EnvSpec
 
@@ -62,6 +63,11 @@ def _snapshot_line(last: AgentTickOutput) -> str:
         f"state_keys={list(last.state.keys())}, location={last.location!r}"
     )
 
+@lru_cache(maxsize=256)
+def _pairs_json(pairs: Tuple[Tuple[str, str], ...]) -> str:
+    # relations change slowly, so the same pair list recurs tick after tick
+    return json.dumps(pairs, ensure_ascii=False)
+
 async def simulate_group_interaction(
     env: EnvSpec,
     location: str,
@@ -70,7 +76,7 @@ async def simulate_group_interaction(
     participants: List[AgentTickOutput],
     relations_summary: List[str],
     allowed_speakers: List[str],
-    allowed_pairs: List[List[str]],
+    allowed_pairs: Sequence[Sequence[str]],
     temperature: float = 0.7,
     max_tokens: int = 900,
 ) -> Dict[str, Any]:
@@ -89,11 +95,12 @@ async def simulate_group_interaction(
                 agents_snapshot=snapshot or "(none)",
                 relations_summary=rel_txt,
                 allowed_speakers=", ".join(allowed_speakers) if allowed_speakers else "(empty)",
-                allowed_pairs=json.dumps(allowed_pairs, ensure_ascii=False),
+                allowed_pairs=_pairs_json(tuple(map(tuple, allowed_pairs))),
             )
         }],
         temperature=temperature,
         max_tokens=max_tokens,
+        json_object=True,
     )
     # post-process: enforce hard mute
     data.setdefault("location", location)
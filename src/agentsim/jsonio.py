@@ -0,0 +1,30 @@
+"""
+JSON 编解码工具
+优先使用 orjson（C 实现，直接输出 UTF-8 bytes），未安装时回退到标准库 json，
+两种实现的输出均不转义非 ASCII 字符。
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def dumps_bytes(obj: Any, indent: bool = False) -> bytes:
+    """序列化为 UTF-8 bytes；indent=True 时使用两空格缩进"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """从 bytes 或 str 反序列化"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
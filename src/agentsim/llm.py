@@ -1,13 +1,27 @@
+import asyncio
 import os
-import json
-from typing import List, Dict, Any, Optional
+import weakref
+from functools import lru_cache
+from typing import Awaitable, List, Dict, Any, Optional, Tuple, TypeVar
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import (
+    retry, stop_after_attempt, wait_exponential, wait_random_exponential,
+    retry_if_exception, retry_if_exception_type,
+)
 
-from openai import AsyncOpenAI
+import openai
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from openai.types.chat import ChatCompletionMessageParam
 import google.generativeai as genai
 
+from . import jsonio
+from .llm_cache import LLMCache
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，仅 deepseek_fast 模式需要
+    aiohttp = None
+
 load_dotenv()
 
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "deepseek").lower()
@@ -15,15 +29,72 @@ LLM_PROVIDER = os.getenv("LLM_PROVIDER", "deepseek").lower()
 aclient = None
 gemini_model = None
 
+# 同时在途的 LLM 请求上限（与 agents_cli add-batch 共用同一环境变量）；
+# 各服务商限流不同，可用 AGENTSIM_LLM_CONCURRENCY_<PROVIDER>（如 _DEEPSEEK、_GEMINI）单独覆盖
+LLM_CONCURRENCY = max(1, int(
+    os.getenv(f"AGENTSIM_LLM_CONCURRENCY_{LLM_PROVIDER.upper()}")
+    or os.getenv("AGENTSIM_LLM_CONCURRENCY", "8")
+))
+
+
+def _make_http_client() -> Optional[DefaultAsyncHttpxClient]:
+    """
+    显式的 keep-alive 连接池：空闲连接保留 60s（httpx 默认 5s，tick 间隔稍长就要重新握手 TLS），
+    池大小按 LLM_CONCURRENCY 设置；装有 h2 时启用 HTTP/2 多路复用。httpx 不可用时返回 None，沿用 SDK 默认客户端。
+    """
+    try:
+        import httpx
+    except ImportError:
+        return None
+    try:
+        import h2  # noqa: F401  HTTP/2 为可选依赖
+        http2 = True
+    except ImportError:
+        http2 = False
+    limits = httpx.Limits(
+        max_connections=max(64, 2 * LLM_CONCURRENCY),
+        max_keepalive_connections=max(32, LLM_CONCURRENCY),
+        keepalive_expiry=60.0,
+    )
+    return DefaultAsyncHttpxClient(http2=http2, limits=limits)
+
+
+# (api_key, base_url) -> 客户端；同一组凭据在进程内只建一次客户端与连接池，轮换 key 时也复用已有连接
+_async_clients: Dict[Tuple[str, str], AsyncOpenAI] = {}
+
+
+def _get_async_client(api_key: str, base_url: str) -> AsyncOpenAI:
+    """
+    取得（必要时创建）该凭据对应的共享 AsyncOpenAI 客户端。
+    客户端由本模块持有，调用方不要自行 close，统一通过 close_llm_client 关闭。
+    """
+    client = _async_clients.get((api_key, base_url))
+    if client is None:
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=_make_http_client())
+        _async_clients[(api_key, base_url)] = client
+    return client
+
+
 if LLM_PROVIDER == "deepseek":
     API_KEY = os.getenv("DEEPSEEK_API_KEY")
     BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
     MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
     if not API_KEY:
         raise RuntimeError("LLM_PROVIDER=deepseek, 但 DEEPSEEK_API_KEY 未设置。")
-    aclient = AsyncOpenAI(api_key=API_KEY, base_url=BASE_URL)
+    aclient = _get_async_client(API_KEY, BASE_URL)
     print("--- LLM Provider: DeepSeek ---")
 
+elif LLM_PROVIDER == "deepseek_fast":
+    # 与 deepseek 相同的接口与配置，但绕过 OpenAI SDK，用 aiohttp 直接 POST /chat/completions
+    API_KEY = os.getenv("DEEPSEEK_API_KEY")
+    BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
+    MODEL = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
+    if not API_KEY:
+        raise RuntimeError("LLM_PROVIDER=deepseek_fast, 但 DEEPSEEK_API_KEY 未设置。")
+    if aiohttp is None:
+        raise RuntimeError("LLM_PROVIDER=deepseek_fast 需要安装 aiohttp。")
+    print("--- LLM Provider: DeepSeek (aiohttp) ---")
+
 elif LLM_PROVIDER == "gemini":
     API_KEY = os.getenv("GEMINI_API_KEY")
     MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
@@ -37,119 +108,440 @@ elif LLM_PROVIDER == "gemini":
         {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
         {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
     ]
+    # 安全设置在构造模型时转换一次，之后每次调用不再传入
     gemini_model = genai.GenerativeModel(MODEL, safety_settings=safety_settings)
     print("--- LLM Provider: Gemini ---")
 
 else:
     raise RuntimeError(f"不支持的 LLM_PROVIDER: {LLM_PROVIDER}")
 
+# asyncio 原语绑定首次使用它的事件循环，而各 CLI 可能多次 asyncio.run，故每个事件循环一个信号量。
+# 信号量只包住单次服务商请求：重试的退避等待发生在其外，不占用并发名额
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    sem = _llm_semaphores.get(loop)
+    if sem is None:
+        sem = _llm_semaphores[loop] = asyncio.Semaphore(LLM_CONCURRENCY)
+    return sem
+
+# temperature=0 的调用视为确定性的：按 (模型, 消息, max_tokens) 缓存原始响应文本
+# 容量为 0 表示关闭；TTL 单位为秒，0 表示不过期
+LLM_CACHE_SIZE = max(0, int(os.getenv("AGENTSIM_LLM_CACHE_SIZE", "256")))
+LLM_CACHE_TTL = max(0.0, float(os.getenv("AGENTSIM_LLM_CACHE_TTL", "0")))
+response_cache = LLMCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+
+# DeepSeek 流式读取：回复以 JSON 对象/数组开头时，顶层值一闭合即停止读取，不等待其后的多余输出
+LLM_STREAM = os.getenv("AGENTSIM_LLM_STREAM", "0") == "1"
+
 
 
 class LLMError(Exception):
     pass
 
+
+class LLMCallError(LLMError):
+    """服务商请求本身失败（瞬时错误已在 _call_llm 内带抖动重试过），chat_json 不再整体重试"""
+
+
+class LLMTransientError(LLMError):
+    """直连模式下服务端返回 429/5xx"""
+
+
+# 值得重试的瞬时错误：连接失败/超时、429 限流、5xx；其余错误（鉴权、参数等）重试无益
+_TRANSIENT_ERRORS: Tuple[type, ...] = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    LLMTransientError,
+)
+if aiohttp is not None:
+    _TRANSIENT_ERRORS += (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+try:
+    from google.api_core import exceptions as _gexc
+    _TRANSIENT_ERRORS += (
+        _gexc.ResourceExhausted,
+        _gexc.ServiceUnavailable,
+        _gexc.DeadlineExceeded,
+        _gexc.InternalServerError,
+    )
+except ImportError:  # 仅随 google-generativeai 安装
+    pass
+
+
+# deepseek_fast 模式的 aiohttp 会话：与信号量一样按事件循环各建一个
+_aiohttp_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+def _aiohttp_session() -> Any:
+    loop = asyncio.get_running_loop()
+    session = _aiohttp_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(limit=max(256, 2 * LLM_CONCURRENCY), ttl_dns_cache=300)
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"},
+        )
+        _aiohttp_sessions[loop] = session
+    return session
+
+
+async def close_llm_client() -> None:
+    """关闭所有共享客户端及其 HTTP 连接池（长驻进程退出前调用）"""
+    while _async_clients:
+        _, client = _async_clients.popitem()
+        await client.close()
+    loop = asyncio.get_running_loop()
+    session = _aiohttp_sessions.pop(loop, None)
+    if session is not None:
+        await session.close()
+
+
+_T = TypeVar("_T")
+
+
+def run_with_llm(main: Awaitable[_T]) -> _T:
+    """
+    CLI 入口用的 asyncio.run：main 结束（含异常）后在同一事件循环内调用 close_llm_client，
+    避免 deepseek_fast 的 aiohttp 会话未关闭导致退出时出现 Unclosed client session 警告。
+    """
+    async def _runner() -> _T:
+        try:
+            return await main
+        finally:
+            await close_llm_client()
+
+    return asyncio.run(_runner())
+
+@retry(
+    reraise=True,
+    stop=stop_after_attempt(4),
+    # 随机抖动的指数退避：同一 tick 内同时失败的请求不会在同一时刻一起重试
+    wait=wait_random_exponential(min=0.5, max=8),
+    retry=retry_if_exception_type(_TRANSIENT_ERRORS),
+)
 async def _call_llm(
     messages: List[ChatCompletionMessageParam],
     temperature: float,
     max_tokens: Optional[int],
-) -> str:
+    json_object: bool = False,
+) -> Tuple[str, Optional[str]]:
     """
-    根据全局配置调用相应的 LLM 服务并返回文本响应。
+    根据全局配置调用相应的 LLM 服务，返回 (文本响应, 缓存键)；同时在途的请求数受 LLM_CONCURRENCY 限制。
+    连接/限流/5xx 等瞬时错误在此重试，退避等待期间不占用并发名额。
+    temperature=0 的响应按请求内容缓存，相同请求不再访问网络（缓存文本，调用方每次自行解析）。
+    缓存键仅在需要写入缓存时返回（命中或不可缓存时为 None），由调用方在响应解析成功后再写入，
+    避免把无法解析的回答缓存下来并在重试时反复重放。
     """
+    key = None
+    if temperature == 0.0 and response_cache.maxsize:
+        key = LLMCache.make_key(LLM_PROVIDER, MODEL, max_tokens, json_object, messages)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached, None
+
+    async with _llm_semaphore():
+        content = await _call_provider(messages, temperature, max_tokens, json_object)
+    return content, key
+
+
+async def _call_provider(
+    messages: List[ChatCompletionMessageParam],
+    temperature: float,
+    max_tokens: Optional[int],
+    json_object: bool = False,
+) -> str:
     if LLM_PROVIDER == "deepseek":
-        if not aclient:
-            raise RuntimeError("DeepSeek 客户端未初始化。")
-        resp = await aclient.chat.completions.create(
+        client = _get_async_client(API_KEY, BASE_URL)
+        # JSON 模式：服务端保证输出单个合法 JSON 对象
+        extra: Dict[str, Any] = {"response_format": {"type": "json_object"}} if json_object else {}
+        if LLM_STREAM:
+            return await _stream_completion(
+                client,
+                model=MODEL,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra,
+            )
+        resp = await client.chat.completions.create(
             model=MODEL,
             messages=messages,
             temperature=temperature,
             max_tokens=max_tokens,
+            **extra,
         )
         return (resp.choices[0].message.content or "").strip()
 
+    elif LLM_PROVIDER == "deepseek_fast":
+        return await _call_deepseek_raw(messages, temperature, max_tokens, json_object)
+
     elif LLM_PROVIDER == "gemini":
         if not gemini_model:
             raise RuntimeError("Gemini 模型未初始化。")
         
-        # Gemini 的消息格式与 OpenAI 不同，需要转换
+        # Gemini 的消息格式与 OpenAI 不同，需要转换（单次遍历）：
+        # system message 不单独发送，第一条 system 的内容作为前缀并入第一条消息
+        # 连续同角色的消息合并为一轮：只在角色切换时新建一轮，其余直接追加到当前轮的 parts
         gemini_messages = []
+        system_prompt = None
+        prefixed = False
+        last_role = None
+        parts: List[Any] = []
         for msg in messages:
-            # 忽略 system message，将其内容合并到第一个 user message 中
             if msg["role"] == "system":
+                if system_prompt is None:
+                    system_prompt = msg["content"]
                 continue
             role = "user" if msg["role"] == "user" else "model"
-            if gemini_messages and gemini_messages[-1]["role"] == role:
-                gemini_messages[-1]["parts"].append(msg["content"])
+            if role == last_role:
+                parts.append(msg["content"])
+                continue
+            if last_role is None and system_prompt:
+                prefixed = True
+                parts = [f"{system_prompt}\n\n---\n\n", msg["content"]]
             else:
-                gemini_messages.append({"role": role, "parts": [msg["content"]]})
-        
-        # 将 system prompt 的内容加到第一个 user prompt 前面
-        system_prompt = next((m['content'] for m in messages if m['role'] == 'system'), None)
-        if system_prompt and gemini_messages:
-            gemini_messages[0]['parts'].insert(0, f"{system_prompt}\n\n---\n\n")
+                parts = [msg["content"]]
+            gemini_messages.append({"role": role, "parts": parts})
+            last_role = role
+
+        # system 出现在首条消息之后的少见情况：仍补到最前面
+        if system_prompt and gemini_messages and not prefixed:
+            gemini_messages[0]["parts"].insert(0, f"{system_prompt}\n\n---\n\n")
 
-        resp = await gemini_model.generate_content_async(gemini_messages)
+        resp = await gemini_model.generate_content_async(
+            gemini_messages,
+            generation_config=_gemini_generation_config(temperature),
+        )
         return resp.text.strip()
     
     else:
         raise RuntimeError(f"LLM_PROVIDER 配置错误: {LLM_PROVIDER}")
 
 
+async def _call_deepseek_raw(
+    messages: List[ChatCompletionMessageParam],
+    temperature: float,
+    max_tokens: Optional[int],
+    json_object: bool = False,
+) -> str:
+    """直接 POST OpenAI 兼容的 /chat/completions，省去 SDK 的请求构造与响应模型校验"""
+    body: Dict[str, Any] = {"model": MODEL, "temperature": temperature}
+    if max_tokens is not None:
+        body["max_tokens"] = max_tokens
+    if json_object:
+        body["response_format"] = {"type": "json_object"}
+    # messages 单独序列化后拼进请求体：重复出现的 system 提示直接取缓存的字节
+    encoded = [
+        _system_message_bytes(m["content"])
+        if m["role"] == "system" and len(m) == 2 and isinstance(m["content"], str)
+        else jsonio.dumps_bytes(m)
+        for m in messages
+    ]
+    payload = jsonio.dumps_bytes(body)[:-1] + b',"messages":[' + b",".join(encoded) + b"]}"
+    async with _aiohttp_session().post(f"{BASE_URL.rstrip('/')}/chat/completions", data=payload) as resp:
+        raw = await resp.read()
+        if resp.status == 429 or resp.status >= 500:
+            raise LLMTransientError(f"HTTP {resp.status}: {raw[:200]!r}")
+        if resp.status >= 400:
+            raise LLMError(f"HTTP {resp.status}: {raw[:200]!r}")
+    data = jsonio.loads(raw)
+    return (data["choices"][0]["message"].get("content") or "").strip()
+
+
+@lru_cache(maxsize=32)
+def _gemini_generation_config(temperature: float) -> Any:
+    """
+    按温度缓存 GenerationConfig，相同温度的调用共用同一对象。
+    不设 max_output_tokens：2.5 系列模型的思考 token 也计入该上限，沿用 max_tokens 容易把正文截空。
+    """
+    return genai.types.GenerationConfig(temperature=temperature)
+
+
+async def _stream_completion(client: AsyncOpenAI, **kwargs: Any) -> str:
+    """
+    以 stream=True 读取回复。回复以 '{' 或 '[' 开头时，边接收边扫描括号深度，
+    首个顶层值闭合后立即关闭流，只返回到该处为止的文本（chat_json 的截断恢复本来也只取这一段）。
+    """
+    stream = await client.chat.completions.create(stream=True, **kwargs)
+    parts: List[str] = []
+    scanner: Optional[_JsonEndScanner] = None
+    started = False
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            if scanner is None:
+                if started:
+                    continue
+                head = delta.lstrip()
+                if not head:
+                    continue
+                started = True
+                if head[0] not in "{[":
+                    continue
+                # 从回复开头扫描，保证 end 是整段文本中的下标
+                scanner = _JsonEndScanner()
+                delta = "".join(parts)
+            if scanner.feed(delta) >= 0:
+                break
+    finally:
+        await stream.close()
+    content = "".join(parts)
+    if scanner is not None and scanner.end >= 0:
+        content = content[:scanner.end + 1]
+    return content.strip()
+
+
+class _JsonEndScanner:
+    """增量扫描文本，定位首个顶层 JSON 对象/数组的结束下标（感知字符串与转义）"""
+
+    __slots__ = ("depth", "in_str", "escaped", "pos", "end", "unbalanced")
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.in_str = self.escaped = False
+        self.pos = 0            # 已扫描的字符数
+        self.end = -1           # 首个顶层值最后一个字符的下标，尚未闭合为 -1
+        self.unbalanced = False  # 先遇到多余的闭括号
+
+    def feed(self, text: str) -> int:
+        """接着扫描后续文本；返回 end（已确定后不再变化）"""
+        if self.end >= 0:
+            return self.end
+        depth, in_str, escaped = self.depth, self.in_str, self.escaped
+        for i, ch in enumerate(text):
+            if in_str:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_str = False
+            elif ch == '"':
+                in_str = True
+            elif ch == "{" or ch == "[":
+                depth += 1
+            elif ch == "}" or ch == "]":
+                depth -= 1
+                if depth <= 0:
+                    self.unbalanced = depth < 0
+                    self.end = self.pos + i
+                    break
+        self.depth, self.in_str, self.escaped = depth, in_str, escaped
+        if self.end < 0:
+            self.pos += len(text)
+        return self.end
+
+
+_NO_JSON = object()
+
+
+def _recover_json_prefix(content: str) -> Any:
+    """
+    解析 content 中以 '}' 或 ']' 结尾、可被完整解析的最长前缀（丢弃其后的多余内容），失败返回 _NO_JSON。
+    先试最后一个 '}'/']' 处截断；否则只有开头第一个完整的顶层对象/数组可能合法，
+    用一次感知字符串与转义的括号深度扫描定位它，最多再解析一次。
+    """
+    last = max(content.rfind("}"), content.rfind("]"))
+    if last < 0:
+        return _NO_JSON
+    try:
+        return jsonio.loads(content[:last + 1])
+    except Exception:
+        pass
+
+    scanner = _JsonEndScanner()
+    end = scanner.feed(content)
+    if end < 0 or scanner.unbalanced or end == last:
+        return _NO_JSON
+    try:
+        return jsonio.loads(content[:end + 1])
+    except Exception:
+        return _NO_JSON
+
+
+@lru_cache(maxsize=256)
+def _system_message(system: str) -> ChatCompletionMessageParam:
+    """同一 system 提示复用同一个（只读）消息 dict，直连模式下其序列化结果也随之缓存"""
+    return {"role": "system", "content": system}
+
+
+@lru_cache(maxsize=256)
+def _system_message_bytes(system: str) -> bytes:
+    return jsonio.dumps_bytes({"role": "system", "content": system})
+
+
+# JSON 纠错轮次的固定追问，只读共享
+_JSON_FIX_PROMPT: ChatCompletionMessageParam = {
+    "role": "user",
+    "content": (
+        "上面不是严格 JSON。"
+        "请只输出一个 JSON 对象，不要包含解释或代码块。"
+    ),
+}
+
+
 @retry(
     reraise=True,
     stop=stop_after_attempt(4),
     wait=wait_exponential(multiplier=0.8, min=1, max=8),
-    retry=retry_if_exception_type(LLMError),
+    # 只为输出格式问题整体重试；请求失败已在 _call_llm 内重试过
+    retry=retry_if_exception(lambda e: isinstance(e, LLMError) and not isinstance(e, LLMCallError)),
 )
 async def chat_json(
     messages: List[ChatCompletionMessageParam],
     temperature: float = 0.7,
     max_tokens: Optional[int] = 512,
     system: Optional[str] = None,
+    json_object: bool = False,
 ) -> Dict[str, Any]:
     """
     期望 LLM 输出严格 JSON；若非 JSON，尝试二次纠正（让模型自我纠错）。
+    json_object=True 表示期望输出为单个 JSON 对象（非数组），DeepSeek 下启用服务端 JSON 模式，
+    多数情况下可省去纠错往返；该模式要求提示词中出现 "json" 字样，否则不启用。
     """
     msgs: List[ChatCompletionMessageParam] = []
     if system:
-        msgs.append({"role": "system", "content": system})
+        msgs.append(_system_message(system))
     msgs.extend(messages)
+    if json_object:
+        json_object = any("json" in str(m.get("content", "")).lower() for m in msgs)
 
     try:
-        content = await _call_llm(msgs, temperature, max_tokens)
+        content, key = await _call_llm(msgs, temperature, max_tokens, json_object)
     except Exception as e:
-        raise LLMError(str(e))
+        raise LLMCallError(str(e)) from e
 
-    # 直接尝试 JSON 解析
+    # 直接尝试 JSON 解析；只有能解析出结果的响应才写入缓存
     try:
-        return json.loads(content)
+        data = jsonio.loads(content)
     except Exception as first_err:
         # 尝试提取可能被截断的JSON（去掉末尾不完整部分）
+        recovered = _recover_json_prefix(content)
+        if recovered is not _NO_JSON:
+            if key is not None:
+                response_cache.set(key, content)
+            return recovered
+
+        # 让模型把上条回答转成 JSON（在原消息列表上追加，不再拼接出新列表）
+        msgs.append({"role": "assistant", "content": content})
+        msgs.append(_JSON_FIX_PROMPT)
         try:
-            # 找到最后一个完整的 '}' 或 ']'，尝试截断后解析
-            for i in range(len(content)-1, -1, -1):
-                if content[i] in ('}', ']'):
-                    truncated = content[:i+1]
-                    try:
-                        return json.loads(truncated)
-                    except Exception:
-                        continue
-        except Exception:
-            pass
-        
-        # 让模型把上条回答转成 JSON
-        fix_msgs: List[ChatCompletionMessageParam] = msgs + [
-            {"role": "assistant", "content": content},
-            {
-                "role": "user",
-                "content": (
-                    "上面不是严格 JSON。"
-                    "请只输出一个 JSON 对象，不要包含解释或代码块。"
-                ),
-            },
-        ]
-        try:
-            content2 = await _call_llm(fix_msgs, 0.0, max_tokens)
-            return json.loads(content2)
+            content2, key2 = await _call_llm(msgs, 0.0, max_tokens, json_object)
+            data = jsonio.loads(content2)
         except Exception as e:
-            raise LLMError(f"JSON 解析失败：{e}")
\ No newline at end of file
+            raise LLMError(f"JSON 解析失败：{e}")
+        if key2 is not None:
+            response_cache.set(key2, content2)
+        return data
+
+    if key is not None:
+        response_cache.set(key, content)
+    return data
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+LLM 响应缓存
+- 进程内 LRU（OrderedDict），可选 TTL（秒，0 表示不过期）
+- 键为请求内容的 SHA-256；值为原始响应文本（由调用方每次自行解析，避免共享可变结果）
+- hits/misses 统计，便于评估缓存命中率
+- DiskCache：跨进程复用的文件型缓存（每键一个文件），值为 JSON 可序列化对象
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from time import monotonic, time
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import jsonio
+
+
+class LLMCache:
+    def __init__(self, maxsize: int = 256, ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # key -> (写入时间, 响应文本)
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """由任意可 JSON 序列化的请求要素生成缓存键"""
+        return hashlib.sha256(jsonio.dumps_bytes(list(parts))).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        item = self._data.get(key)
+        if item is not None and self.ttl and monotonic() - item[0] > self.ttl:
+            del self._data[key]
+            item = None
+        if item is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def set(self, key: str, value: str) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (monotonic(), value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class DiskCache:
+    """
+    文件型 LRU 缓存：每个键对应 root 下一个 JSON 文件
+    - TTL 依据文件 mtime（0 表示不过期）；命中时刷新 mtime，作为最近使用时间
+    - 写入经临时文件 + os.replace，并发写同一键不会读到半个文件
+    - 条目数超过 maxsize 时按 mtime 淘汰最久未用的文件；条目数由计数器跟踪，
+      只在首次写入时与超限时扫描目录，而不是每次写入都扫描
+    """
+
+    def __init__(self, root: str, maxsize: int = 256, ttl: float = 0.0):
+        self.root = root
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._dir_ready = False
+        # 目录中的条目数（首次写入时扫描得到；其他进程同时写入时只是近似值）
+        self._count = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key + ".json")
+
+    def get(self, key: str) -> Any:
+        """返回缓存值；未命中、过期或文件损坏时返回 None"""
+        path = self._path(key)
+        try:
+            if self.ttl and time() - os.stat(path).st_mtime > self.ttl:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, "rb") as f:
+                value = jsonio.loads(f.read())
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        if not self._dir_ready:
+            os.makedirs(self.root, exist_ok=True)
+            self._count = len(self._entries())
+            self._dir_ready = True
+        path = self._path(key)
+        is_new = not os.path.exists(path)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(jsonio.dumps_bytes(value))
+        os.replace(tmp, path)
+        if is_new:
+            self._count += 1
+            if self._count > self.maxsize:
+                self._prune()
+
+    def _entries(self) -> List[os.DirEntry]:
+        with os.scandir(self.root) as it:
+            return [e for e in it if e.name.endswith(".json")]
+
+    def _prune(self) -> None:
+        """超限时淘汰到约 90% 容量，留出余量，之后的若干次写入不必再扫描目录"""
+        entries = self._entries()
+        if len(entries) > self.maxsize:
+            keep = self.maxsize - max(1, self.maxsize // 10)
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for e in entries[:len(entries) - keep]:
+                try:
+                    os.remove(e.path)
+                except OSError:
+                    pass
+            self._count = keep
+        else:
+            self._count = len(entries)
@@ -1,20 +1,56 @@
+import atexit
 import os
-import json
-from typing import Any, Dict
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from . import jsonio
+
+try:
+    import msgpack
+except ImportError:  # msgpack 为可选依赖
+    msgpack = None
 
 # ---- Agents 日志根目录（每个实验会覆盖） ----
 _AGENT_LOG_ROOT: str = os.getenv("AGENT_LOG_DIR", "logs/agents")
 # ---- Events 日志根目录（每个实验会覆盖） ----
 _EVENT_LOG_ROOT: str = os.getenv("EVENT_LOG_DIR", "logs/events")
 
+# ---- 日志格式 ----
+# 默认 JSONL，便于直接查看；长时间仿真可设 AGENTSIM_LOG_FORMAT=msgpack（需安装 msgpack），
+# 改写为 4 字节小端长度前缀 + msgpack 帧的 .msgpack 文件，体积更小、编码更快，用 read_log 读取
+LOG_FORMAT: str = (
+    "msgpack"
+    if os.getenv("AGENTSIM_LOG_FORMAT", "jsonl").lower() == "msgpack" and msgpack is not None
+    else "jsonl"
+)
+_LOG_EXT = ".msgpack" if LOG_FORMAT == "msgpack" else ".jsonl"
+
+# ---- 追加写缓冲 ----
+# 开启时每个日志文件只打开一次并保持句柄，记录先写入 64KB 缓冲，
+# 在 tick 结束、切换日志目录或进程退出时统一 flush_all；
+# 多进程同时写同一批日志时设 AGENTSIM_LOG_BUFFERED=0，退回每条记录单独打开追加
+LOG_BUFFERED: bool = os.getenv("AGENTSIM_LOG_BUFFERED", "1") != "0"
+_LOG_BUFFER_SIZE = 1 << 16
+# 常驻句柄数上限：按最近使用顺序保存，超出时关闭最久未写的句柄，避免 agent 较多时耗尽文件描述符
+_LOG_MAX_HANDLES = max(1, int(os.getenv("AGENTSIM_LOG_MAX_HANDLES", "128")))
+_handles: "OrderedDict[str, BinaryIO]" = OrderedDict()
+# 已确认存在的日志目录：每个目录只 makedirs 一次，切换日志根目录时清空
+_ensured_dirs: Set[str] = set()
+
 def set_log_root(root: str) -> None:
     """兼容旧接口：只设置 agent 日志根目录"""
     global _AGENT_LOG_ROOT
+    close_all()
+    _ensured_dirs.clear()
     _AGENT_LOG_ROOT = root
 
 def set_event_log_root(root: str) -> None:
     """设置事件日志根目录（实验粒度）"""
     global _EVENT_LOG_ROOT
+    close_all()
+    _ensured_dirs.clear()
     _EVENT_LOG_ROOT = root
 
 def set_exp_log_roots(base: str) -> None:
@@ -23,35 +59,166 @@ def set_exp_log_roots(base: str) -> None:
     set_event_log_root(os.path.join(base, "events"))
 
 def _ensure_dir(path: str):
-    os.makedirs(path, exist_ok=True)
+    if path not in _ensured_dirs:
+        os.makedirs(path, exist_ok=True)
+        _ensured_dirs.add(path)
+
+def _line(record: Dict[str, Any]) -> bytes:
+    """编码一条记录：JSONL 为一行；msgpack 为长度前缀 + 帧"""
+    if LOG_FORMAT == "msgpack":
+        frame = msgpack.packb(record, use_bin_type=True)
+        return len(frame).to_bytes(4, "little") + frame
+    return jsonio.dumps_bytes(record) + b"\n"
+
+def read_log(path: str) -> Iterator[Dict[str, Any]]:
+    """按扩展名逐条读取 agent/事件日志（.jsonl 或 .msgpack）；末尾写了一半的帧会被忽略"""
+    if path.endswith(".msgpack"):
+        if msgpack is None:
+            raise RuntimeError("读取 .msgpack 日志需要安装 msgpack")
+        with open(path, "rb") as f:
+            while True:
+                head = f.read(4)
+                if len(head) < 4:
+                    return
+                size = int.from_bytes(head, "little")
+                frame = f.read(size)
+                if len(frame) < size:
+                    return
+                yield msgpack.unpackb(frame, raw=False)
+    else:
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield jsonio.loads(line)
+
+_TAIL_BLOCK = 1 << 13
+
+def read_last_log(path: str) -> Optional[Dict[str, Any]]:
+    """
+    只读取日志的最后一条记录，没有记录时返回 None：
+    JSONL 从文件末尾按块向前读到最后一个非空行；msgpack 只跳读长度前缀定位最后一个完整帧，只解码这一帧
+    """
+    if path.endswith(".msgpack"):
+        if msgpack is None:
+            raise RuntimeError("读取 .msgpack 日志需要安装 msgpack")
+        with open(path, "rb") as f:
+            end = os.fstat(f.fileno()).st_size
+            pos, last, last_size = 0, -1, 0
+            while pos + 4 <= end:
+                f.seek(pos)
+                size = int.from_bytes(f.read(4), "little")
+                if pos + 4 + size > end:
+                    break
+                last, last_size = pos + 4, size
+                pos += 4 + size
+            if last < 0:
+                return None
+            f.seek(last)
+            return msgpack.unpackb(f.read(last_size), raw=False)
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        tail = b""
+        while pos > 0:
+            step = min(_TAIL_BLOCK, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+            body = tail.rstrip()
+            if not body:
+                continue
+            nl = body.rfind(b"\n")
+            if nl >= 0 or pos == 0:
+                return jsonio.loads(body[nl + 1:])
+    return None
+
+def _append_lines(path: str, lines: List[bytes]) -> None:
+    """把若干行追加到 path：缓冲模式下复用常驻句柄，否则打开-写入-关闭"""
+    if not LOG_BUFFERED:
+        with open(path, "ab") as f:
+            f.writelines(lines)
+        return
+    f = _handles.get(path)
+    if f is None:
+        if len(_handles) >= _LOG_MAX_HANDLES:
+            _handles.popitem(last=False)[1].close()
+        f = open(path, "ab", buffering=_LOG_BUFFER_SIZE)
+        _handles[path] = f
+    else:
+        _handles.move_to_end(path)
+    f.writelines(lines)
 
+def flush_all() -> None:
+    """把所有缓冲中的日志写出到磁盘（tick 结束时调用）"""
+    for f in _handles.values():
+        f.flush()
+
+def close_all() -> None:
+    """写出并关闭所有常驻日志句柄"""
+    while _handles:
+        _, f = _handles.popitem()
+        f.close()
+
+atexit.register(close_all)
+
+# 文件名只保留字母数字（含中文等 Unicode 字符）与 "_" "-" "."；\w 与 str.isalnum() 加 "_" 逐字符等价
+_UNSAFE_NAME_RE = re.compile(r"[^\w.\-]+")
+
+# agent 名称在一次运行中基本不变，清洗结果与文件路径都按名称缓存
+@lru_cache(maxsize=4096)
 def _safe_name(name: str) -> str:
-    return "".join(c for c in str(name) if c.isalnum() or c in ("_", "-", "."))
+    return _UNSAFE_NAME_RE.sub("", str(name))
+
+@lru_cache(maxsize=4096)
+def _agent_file(root: str, name: str) -> str:
+    return os.path.join(root, f"{_safe_name(name)}{_LOG_EXT}")
 
 # ------------ Agent 日志 ------------
 def _agent_log_path(name: str) -> str:
     _ensure_dir(_AGENT_LOG_ROOT)
-    return os.path.join(_AGENT_LOG_ROOT, f"{_safe_name(name)}.jsonl")
+    return _agent_file(_AGENT_LOG_ROOT, name)
 
 def init_agent_log(name: str, initial_record: Dict[str, Any]) -> None:
     path = _agent_log_path(name)
     if not os.path.exists(path):
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(json.dumps(initial_record, ensure_ascii=False) + "\n")
+        with open(path, "wb") as f:
+            f.write(_line(initial_record))
+
+def init_agent_logs_batch(entries: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """批量初始化 agent 日志：日志目录只检查一次，每个文件只打开一次；已存在的日志保持不变"""
+    if not entries:
+        return
+    _ensure_dir(_AGENT_LOG_ROOT)
+    pending: Dict[str, Dict[str, Any]] = {}
+    for name, record in entries:
+        path = _agent_file(_AGENT_LOG_ROOT, name)
+        if path not in pending and not os.path.exists(path):
+            pending[path] = record
+    for path, record in pending.items():
+        with open(path, "wb") as f:
+            f.write(_line(record))
 
 def append_agent_log(name_or_id: str, record: Dict[str, Any]) -> None:
     path = _agent_log_path(name_or_id)
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    _append_lines(path, [_line(record)])
+
+def append_agent_logs_batch(entries: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """批量追加 agent 日志：按文件分组，每个文件一次 writelines，保持各文件内的记录顺序"""
+    if not entries:
+        return
+    _ensure_dir(_AGENT_LOG_ROOT)
+    grouped: Dict[str, List[bytes]] = {}
+    for name, record in entries:
+        path = _agent_file(_AGENT_LOG_ROOT, name)
+        grouped.setdefault(path, []).append(_line(record))
+    for path, lines in grouped.items():
+        _append_lines(path, lines)
 
 # ------------ 事件日志（集中存放） ------------
 def _event_log_path() -> str:
-    path = os.path.join(_EVENT_LOG_ROOT, "encounters.jsonl")
-    _ensure_dir(os.path.dirname(path))
-    return path
+    _ensure_dir(_EVENT_LOG_ROOT)
+    return os.path.join(_EVENT_LOG_ROOT, f"encounters{_LOG_EXT}")
 
 def append_event_log(record: Dict[str, Any]) -> None:
     """记录地点级相遇/冲突/协作等事件"""
     path = _event_log_path()
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    _append_lines(path, [_line(record)])
@@ -1,6 +1,18 @@
-from typing import List, Optional, Dict, Any, Union
-from pydantic import BaseModel, Field, validator
-from .emotion_model import EmotionProfile
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ValidationInfo, field_validator
+from .emotion_model import _DIMS, EmotionGenerator, EmotionProfile, parse_legacy_mood
+
+
+def _unit_strength(s: Any) -> float:
+    """关系强度规整为 [0,1] 内的 float，无法转换时为 0.0；已合规的值（绝大多数）直接返回"""
+    if type(s) is float and 0.0 <= s <= 1.0:
+        return s
+    try:
+        s = float(s)
+    except Exception:
+        return 0.0
+    return max(0.0, min(1.0, s))
 
 
 class AgentPersona(BaseModel):
@@ -18,19 +30,16 @@ class AgentPersona(BaseModel):
     # 社会关系：以 agent_id 为键
     relations: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
 
-    @validator("relations")
-    def _no_self_loop(cls, v, values):
-        aid = values.get("id")
+    @field_validator("relations")
+    @classmethod
+    def _no_self_loop(cls, v, info: ValidationInfo):
+        aid = info.data.get("id")
         if aid and aid in v:
             v.pop(aid, None)
-        for k, rec in v.items():
-            s = rec.get("strength", 0.0)
-            try:
-                s = float(s)
-            except Exception:
-                s = 0.0
-            rec["strength"] = max(0.0, min(1.0, s))
-            rec["type"] = str(rec.get("type", "stranger"))
+        for rec in v.values():
+            rec["strength"] = _unit_strength(rec.get("strength", 0.0))
+            t = rec.get("type", "stranger")
+            rec["type"] = t if type(t) is str else str(t)
         return v
 
 
@@ -40,7 +49,14 @@ class EnvSpec(BaseModel):
     rules: List[str] = Field(default_factory=list, description="补充规则，如安全/距离/视野/胜负条件等")
 
 
-class AgentTickOutput(BaseModel):
+@dataclass(slots=True)
+class AgentTickOutput:
+    """
+    单个 agent 在一个 tick 的输出。每 tick 每个 agent 构造一次，属于热路径，
+    故用普通 dataclass 而非 pydantic 模型：字段由 from_llm_dict 做必要的类型规整，不再逐字段校验。
+    整个运行期间都保存在 history 中，用 __slots__ 去掉实例 __dict__；
+    群体交互阶段会原地更新 action/speech/location 等字段，故不设 frozen。
+    """
     agent_id: str
     tick: int
     action: str
@@ -48,9 +64,59 @@ class AgentTickOutput(BaseModel):
     state: Dict[str, Any]
     thoughts: str
     location: str
-    memory: List[str] = Field(default_factory=list, description="本 tick 的记忆（新增或强化点）")
-    emotion: Optional[EmotionProfile] = Field(default=None, description="情绪画像（包含多个维度的数值化情绪状态，支持负值和复合情绪）")
-    emotional_interactions: List[Dict[str, Any]] = Field(default_factory=list, description="本 tick 的情感互动记录")
+    # 本 tick 的记忆（新增或强化点）
+    memory: List[str] = field(default_factory=list)
+    # 情绪画像（包含多个维度的数值化情绪状态，支持负值和复合情绪）
+    emotion: Optional[EmotionProfile] = None
+    # 本 tick 的情感互动记录
+    emotional_interactions: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def from_llm_dict(
+        cls,
+        agent_id: str,
+        tick: int,
+        data: Dict[str, Any],
+        state: Dict[str, Any],
+        default_location: str,
+        emotion: Optional[EmotionProfile] = None,
+    ) -> "AgentTickOutput":
+        """由 LLM 返回的 JSON 构造：文本字段转为去空白的字符串，缺失地点沿用 default_location"""
+        return cls(
+            agent_id=agent_id,
+            tick=tick,
+            action=str(data.get("action", "")).strip(),
+            speech=str(data.get("speech", "")).strip(),
+            state=state,
+            thoughts=str(data.get("thoughts", "")).strip(),
+            location=str(data.get("location", "") or default_location),
+            memory=[str(m) for m in data.get("memory") or []],
+            emotion=emotion,
+        )
+
+    def model_dump(self) -> Dict[str, Any]:
+        """与原 pydantic 模型的 model_dump 输出一致（情绪按各维度原始值展开）"""
+        return {
+            "agent_id": self.agent_id,
+            "tick": self.tick,
+            "action": self.action,
+            "speech": self.speech,
+            "state": self.state,
+            "thoughts": self.thoughts,
+            "location": self.location,
+            "memory": list(self.memory),
+            "emotion": _dump_emotion(self.emotion) if self.emotion is not None else None,
+            "emotional_interactions": list(self.emotional_interactions),
+        }
+
+
+def _dump_emotion(emotion: EmotionProfile) -> Dict[str, Any]:
+    """情绪按各维度原始值展开（不做 to_dict 的 3 位小数量化），再附上时间戳、上下文与强度"""
+    data: Dict[str, Any] = dict(zip(_DIMS, emotion.vec.tolist()))
+    data["timestamp"] = emotion.timestamp
+    data["context"] = emotion.context
+    data["intensity"] = emotion.intensity
+    return data
 
 
 class SimulationConfig(BaseModel):
@@ -66,13 +132,15 @@ class SimulationConfig(BaseModel):
         description="关系硬约束强度 0~1；1 表示严格按关系决定谁发声/互动"
     )
 
-    @validator("steps")
+    @field_validator("steps")
+    @classmethod
     def _steps_positive(cls, v: int) -> int:
         if v <= 0:
             raise ValueError("steps 必须 > 0")
         return v
 
-    @validator("relation_influence")
+    @field_validator("relation_influence")
+    @classmethod
     def _alpha_range(cls, v: float) -> float:
         if v < 0 or v > 1:
             raise ValueError("relation_influence 必须在 [0,1]")
@@ -88,23 +156,23 @@ class SimulationInput(BaseModel):
     env_spec: Optional[EnvSpec] = None
     config: SimulationConfig = SimulationConfig()
 
-    @validator("agents")
+    @field_validator("agents")
+    @classmethod
     def _agents_non_empty(cls, v: List[AgentPersona]) -> List[AgentPersona]:
         if not v:
             raise ValueError("至少需要一个 agent")
         return v
 
-    @validator("env_spec")
-    def _env_or_hint(cls, v, values):
-        if not v and not values.get("env_hint"):
+    @field_validator("env_spec")
+    @classmethod
+    def _env_or_hint(cls, v, info: ValidationInfo):
+        if not v and not info.data.get("env_hint"):
             raise ValueError("必须提供 env_spec 或 env_hint")
         return v
 
 
 def extract_emotion_from_state(state: Dict[str, Any]) -> Optional[EmotionProfile]:
     """从agent状态中提取情绪信息，支持传统mood字符串和新的情绪画像"""
-    from .emotion_model import parse_legacy_mood
-    
     # 检查是否有新的情绪画像
     if "emotion" in state and isinstance(state["emotion"], dict):
         try:
@@ -121,8 +189,6 @@ def extract_emotion_from_state(state: Dict[str, Any]) -> Optional[EmotionProfile
 
 def ensure_emotion_in_state(state: Dict[str, Any], personality: Dict[str, Any] = None) -> Dict[str, Any]:
     """确保状态中包含情绪信息，如果没有则生成默认情绪"""
-    from .emotion_model import EmotionGenerator, parse_legacy_mood
-    
     if "emotion" not in state or not isinstance(state.get("emotion"), dict):
         # 尝试从mood生成情绪
         if "mood" in state and isinstance(state["mood"], str):
@@ -1,66 +1,121 @@
+import asyncio
 import json
+import os
 import uuid
 import random
-from typing import Dict, Any, Optional, List
-from .llm import chat_json
+import string
+import weakref
+from functools import lru_cache
+from time import time
+from typing import Awaitable, Dict, Any, Optional, List, Tuple, TypeVar
+import numpy as np
+
+from .llm import LLM_CONCURRENCY, LLM_PROVIDER, MODEL, chat_json
+from .llm_cache import DiskCache, LLMCache
 from .emotion_model import EmotionGenerator, EmotionProfile
 
 # ===== Enumerations (EN) =====
 GENDER_OPTIONS = ["Male", "Female", "Non-binary/Other"]
 EDU_OPTIONS = ["Middle school", "High school", "Vocational/Trade", "College", "Master's", "PhD"]
 INCOME_OPTIONS = ["<USD 1k/mo", "USD 1k-2k/mo", "USD 2k-5k/mo", "USD 5k-10k/mo", "USD 10k-20k/mo", ">USD 20k/mo"]
+OCCUPATION_SAMPLES = [
+    "Software engineer", "Teacher", "Nurse", "Retail clerk", "Delivery driver", "Accountant",
+    "Chef", "Construction worker", "Student", "Sales representative", "Doctor", "Police officer",
+    "Graphic designer", "Farmer", "Journalist", "Electrician", "Lawyer", "Retiree",
+]
 
 # Common English names (balanced & realistic)
-EN_FIRST_NAMES_M = [
+EN_FIRST_NAMES_M = (
     "James","John","Robert","Michael","William","David","Richard","Joseph",
     "Thomas","Charles","Christopher","Daniel","Matthew","Anthony","Mark","Paul",
     "Andrew","Joshua","Steven","Kevin","Brian","George","Edward","Timothy",
     "Jason","Jeffrey","Ryan","Jacob","Gary","Nicholas","Eric","Jonathan",
     "Stephen","Larry","Justin","Scott","Brandon","Benjamin","Samuel","Gregory"
-]
-EN_FIRST_NAMES_F = [
+)
+EN_FIRST_NAMES_F = (
     "Mary","Patricia","Jennifer","Linda","Elizabeth","Barbara","Susan","Jessica",
     "Sarah","Karen","Nancy","Lisa","Margaret","Betty","Sandra","Ashley","Dorothy",
     "Kimberly","Emily","Donna","Michelle","Carol","Amanda","Melissa","Deborah",
     "Stephanie","Rebecca","Sharon","Laura","Cynthia","Kathleen","Amy","Shirley",
     "Angela","Helen","Anna","Brenda","Pamela","Nicole","Emma","Olivia","Sophia"
-]
-EN_LAST_NAMES = [
+)
+EN_LAST_NAMES = (
     "Smith","Johnson","Williams","Brown","Jones","Garcia","Miller","Davis",
     "Rodriguez","Martinez","Hernandez","Lopez","Gonzalez","Wilson","Anderson",
     "Thomas","Taylor","Moore","Jackson","Martin","Lee","Perez","Thompson",
     "White","Harris","Sanchez","Clark","Ramirez","Lewis","Robinson","Walker",
     "Young","Allen","King","Wright","Scott","Torres","Nguyen","Hill","Flores"
-]
+)
+EN_FIRST_NAMES_ALL = EN_FIRST_NAMES_M + EN_FIRST_NAMES_F
+# Indexed by _first_name_pool()
+_FIRST_NAME_POOLS = (EN_FIRST_NAMES_M, EN_FIRST_NAMES_F, EN_FIRST_NAMES_ALL)
+
+@lru_cache(maxsize=32)
+def _alias_table(items: Tuple[Tuple[str, Any], ...]) -> Optional[Tuple[List[str], List[float], List[int]]]:
+    """
+    Vose's alias method for a weight table: O(k) setup (cached per distribution), O(1) per draw.
+    Negative weights count as 0. Returns (keys, prob, alias), or None if no weight is positive.
+    """
+    keys = [k for k, _ in items]
+    weights = [max(0.0, float(w)) for _, w in items]
+    total = sum(weights)
+    if total <= 0:
+        return None
+    n = len(weights)
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, q in enumerate(scaled) if q < 1.0]
+    large = [i for i, q in enumerate(scaled) if q >= 1.0]
+    while small and large:
+        lo, hi = small.pop(), large.pop()
+        prob[lo], alias[lo] = scaled[lo], hi
+        scaled[hi] += scaled[lo] - 1.0
+        (small if scaled[hi] < 1.0 else large).append(hi)
+    # Leftovers are 1.0 up to rounding error
+    return keys, prob, alias
 
 def _weighted_choice(d: Dict[str, float], default: str) -> str:
     if not d:
         return default
-    items = list(d.items())
-    total = sum(max(0.0, float(w)) for _, w in items)
-    if total <= 0:
+    table = _alias_table(tuple(d.items()))
+    if table is None:
         return default
-    r = random.random() * total
-    acc = 0.0
-    for k, w in items:
-        acc += max(0.0, float(w))
-        if r <= acc:
-            return k
-    return items[-1][0]
+    keys, prob, alias = table
+    i = random.randrange(len(keys))
+    return keys[i] if random.random() < prob[i] else keys[alias[i]]
 
-def _sample_en_name(gender_hint: Optional[str] = None) -> str:
+def _first_name_pool(gender_hint: Optional[str]) -> int:
     if gender_hint and gender_hint.lower().startswith("f"):
-        first = random.choice(EN_FIRST_NAMES_F)
-    elif gender_hint and gender_hint.lower().startswith("m"):
-        first = random.choice(EN_FIRST_NAMES_M)
-    else:
-        first = random.choice(EN_FIRST_NAMES_M + EN_FIRST_NAMES_F)
+        return 1
+    if gender_hint and gender_hint.lower().startswith("m"):
+        return 0
+    return 2
+
+def _sample_en_name(gender_hint: Optional[str] = None) -> str:
+    first = random.choice(_FIRST_NAME_POOLS[_first_name_pool(gender_hint)])
     last = random.choice(EN_LAST_NAMES)
     # 15% chance to have middle initial
     if random.random() < 0.15:
         return f"{first} {chr(random.randint(65,90))}. {last}"
     return f"{first} {last}"
 
+def _sample_en_names(gender_hints: List[Optional[str]]) -> List[str]:
+    """Batched _sample_en_name: one random.choices draw per first-name pool and one for last names."""
+    n = len(gender_hints)
+    groups: Dict[int, List[int]] = {}
+    for i, g in enumerate(gender_hints):
+        groups.setdefault(_first_name_pool(g), []).append(i)
+    firsts = [""] * n
+    for pool, idxs in groups.items():
+        for i, first in zip(idxs, random.choices(_FIRST_NAME_POOLS[pool], k=len(idxs))):
+            firsts[i] = first
+    # 15% chance to have middle initial
+    return [
+        f"{first} {chr(random.randint(65,90))}. {last}" if random.random() < 0.15 else f"{first} {last}"
+        for first, last in zip(firsts, random.choices(EN_LAST_NAMES, k=n))
+    ]
+
 SYS = (
     "You are a strict persona generator. Output must be in ENGLISH only. "
     "All names must be realistic English names (first + last), no placeholders, no duplicates. "
@@ -102,30 +157,85 @@ Hard requirements:
 Return ONLY a JSON ARRAY of length {n}, each element with the schema above. No explanation, no code fences.
 """
 
+# Templates pre-parsed once into (literal, field) pairs; escaped braces are already resolved
+_TemplateParts = Tuple[Tuple[str, Optional[str]], ...]
+
+def _parse_template(tpl: str) -> _TemplateParts:
+    return tuple((lit, field) for lit, field, _, _ in string.Formatter().parse(tpl))
+
+def _bind_template(parts: _TemplateParts, **values: Any) -> _TemplateParts:
+    """Fold the given fields into the literals; other fields stay as placeholders."""
+    out: List[Tuple[str, Optional[str]]] = []
+    acc = ""
+    for lit, field in parts:
+        acc += lit
+        if field is None:
+            continue
+        if field in values:
+            acc += str(values[field])
+        else:
+            out.append((acc, field))
+            acc = ""
+    out.append((acc, None))
+    return tuple(out)
+
+def _render_template(parts: _TemplateParts, **values: Any) -> str:
+    return "".join(lit if field is None else lit + str(values[field]) for lit, field in parts)
+
+_SINGLE_USER_PARTS = _parse_template(SINGLE_USER_TPL)
+_BATCH_USER_PARTS_ENV = _parse_template(BATCH_USER_TPL_ENV)
+
+# Optional on-disk cache of raw batch replies, keyed by provider, model and the exact shard request (off unless a directory is set)
+PERSONA_CACHE_DIR = os.path.expanduser(os.getenv("AGENTSIM_PERSONA_CACHE_DIR", ""))
+_persona_cache: Optional[DiskCache] = DiskCache(
+    PERSONA_CACHE_DIR,
+    maxsize=int(os.getenv("AGENTSIM_PERSONA_CACHE_MAX", "256")),
+    ttl=max(0.0, float(os.getenv("AGENTSIM_PERSONA_CACHE_TTL", "0"))),
+) if PERSONA_CACHE_DIR else None
+
+# Max persona requests in flight (single + batch shards); defaults to the global LLM limit
+PERSONA_MAX_INFLIGHT = max(1, int(os.getenv("AGENTSIM_PERSONA_MAX_INFLIGHT", str(LLM_CONCURRENCY))))
+# One semaphore per event loop: asyncio primitives bind to the loop that first uses them
+_persona_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+T = TypeVar("T")
+
+async def _guarded(aw: Awaitable[T]) -> T:
+    """Run one persona LLM request under the per-loop admission semaphore."""
+    loop = asyncio.get_running_loop()
+    sem = _persona_semaphores.get(loop)
+    if sem is None:
+        sem = _persona_semaphores[loop] = asyncio.Semaphore(PERSONA_MAX_INFLIGHT)
+    async with sem:
+        return await aw
+
 # ==== Public APIs ====
 
 async def generate_persona_default(
-    name: str,
+    name: Optional[str] = None,
     gender: Optional[str] = None,
     age: Optional[int] = None,
     occupation: Optional[str] = None,
     income_level: Optional[str] = None,
     education: Optional[str] = None,
     description: Optional[str] = None,
+    diversity_hint: Optional[str] = None,
 ) -> Dict[str, Any]:
     hints = {k: v for k, v in {
         "name": name, "gender": gender, "age": age, "occupation": occupation,
         "income_level": income_level, "education": education, "description": description,
+        "diversity_hint": diversity_hint,
     }.items() if v is not None}
 
-    data = await chat_json(
+    data = await _guarded(chat_json(
         system=SYS,
-        messages=[{"role": "user", "content": SINGLE_USER_TPL.format(
+        messages=[{"role": "user", "content": _render_template(
+            _SINGLE_USER_PARTS,
             hints=json.dumps(hints, ensure_ascii=False, indent=2) if hints else "(none)"
         )}],
         temperature=0.5,
         max_tokens=800,
-    )
+    ))
     return _normalize_persona(data, fallback_name=name)
 
 async def generate_personas_for_environment(
@@ -133,8 +243,14 @@ async def generate_personas_for_environment(
     env_spec: Dict[str, Any],
     diversity_hint: Optional[str] = None,
     constraints: Optional[Dict[str, Any]] = None,
+    chunk: int = 8,
 ) -> List[Dict[str, Any]]:
-    """Environment-driven persona generation in EN. Falls back to local synthesis if LLM fails."""
+    """
+    Environment-driven persona generation in EN. Falls back to local synthesis if LLM fails.
+    The request is split into sub-batches of at most `chunk` personas that run concurrently,
+    so latency no longer grows with `count` and no single reply hits the output token cap.
+    Each sub-batch is normalized as soon as its reply arrives.
+    """
     if count <= 0:
         return []
 
@@ -144,25 +260,54 @@ async def generate_personas_for_environment(
     constraints = constraints or {}
     constraints_text = json.dumps(constraints, ensure_ascii=False)
 
-    # 1) Try LLM
-    arr: List[Dict[str, Any]] = []
-    try:
-        arr = await chat_json(
-            system=SYS,
-            messages=[{"role": "user", "content": BATCH_USER_TPL_ENV.format(
-                n=count, title=title, prompt=prompt,
-                rules="\n".join(f"- {r}" for r in rules) if rules else "(none)",
-                constraints=constraints_text
-            ) + (f"\n[Additional diversity hint] {diversity_hint}" if diversity_hint else "")}],
-            temperature=0.6,
-            max_tokens=min(1500 + count * 220, 6000),
-        )
-        if not isinstance(arr, list):
-            arr = []
-    except Exception:
-        arr = []
+    # 1) Try LLM, one request per shard
+    chunk = max(1, chunk)
+    shard_sizes = [min(chunk, count - i) for i in range(0, count, chunk)]
+    rules_text = "\n".join(f"- {r}" for r in rules) if rules else "(none)"
+    hint_text = f"\n[Additional diversity hint] {diversity_hint}" if diversity_hint else ""
 
-    personas = [_normalize_persona(x) for x in arr][:count]
+    # The environment block is identical for every shard; bind it once and only fill in n per shard
+    batch_parts = _bind_template(
+        _BATCH_USER_PARTS_ENV, title=title, prompt=prompt, rules=rules_text, constraints=constraints_text
+    )
+
+    async def _shard_request(k: int, i: int) -> List[Dict[str, Any]]:
+        content = _render_template(batch_parts, n=k) + hint_text
+        if len(shard_sizes) > 1:
+            # Tell each shard it is one of several so the batches do not converge on the same people
+            content += f"\n[Batch] {i + 1} of {len(shard_sizes)}; make these people distinct from other batches."
+        max_tokens = min(1500 + k * 220, 6000)
+        # Provider and model are part of the key so switching backends never replays another model's personas
+        key = LLMCache.make_key(LLM_PROVIDER, MODEL, SYS, content, 0.6, max_tokens) if _persona_cache else None
+        res = _persona_cache.get(key) if key else None
+        if res is None:
+            res = await _guarded(chat_json(
+                system=SYS,
+                messages=[{"role": "user", "content": content}],
+                temperature=0.6,
+                max_tokens=max_tokens,
+            ))
+            if key and isinstance(res, list):
+                # Best-effort: a failed cache write must not throw away a reply we already have
+                try:
+                    _persona_cache.set(key, res)
+                except OSError:
+                    pass
+        # Normalize as soon as this shard lands, while the other shards are still in flight
+        if not isinstance(res, list):
+            return []
+        return [_normalize_persona(x) for x in res if isinstance(x, dict)]
+
+    results = await asyncio.gather(
+        *(_shard_request(k, i) for i, k in enumerate(shard_sizes)), return_exceptions=True
+    )
+    personas: List[Dict[str, Any]] = []
+    for res in results:
+        if isinstance(res, BaseException) and not isinstance(res, Exception):
+            raise res
+        if isinstance(res, list):
+            personas.extend(res)
+    del personas[count:]
 
     # 2) Fallback if not enough
     if len(personas) < count:
@@ -175,6 +320,11 @@ async def generate_personas_for_environment(
 
 # ==== Internals ====
 
+# Ultra-common placeholder names the LLM falls back to
+_PLACEHOLDER_NAMES = frozenset({"zhang wei", "wang wei", "li na", "li lei", "test user"})
+# Canonical gender by the first letter of the lowercased value; anything else is Non-binary/Other
+_GENDER_BY_INITIAL = {"m": "Male", "f": "Female"}
+
 def _normalize_persona(data: Dict[str, Any], fallback_name: Optional[str] = None) -> Dict[str, Any]:
     def _get(k, default):
         v = data.get(k)
@@ -182,13 +332,14 @@ def _normalize_persona(data: Dict[str, Any], fallback_name: Optional[str] = None
 
     name = str(_get("name", fallback_name or "Unnamed")).strip()
     # Avoid ultra-common placeholders; enforce English
-    if name.lower() in {"zhang wei", "wang wei", "li na", "li lei", "test user"} or " " not in name:
+    if name.lower() in _PLACEHOLDER_NAMES or " " not in name:
         name = _sample_en_name(data.get("gender"))
 
-    gender = str(_get("gender", random.choice(["Male","Female"]))).strip().title()
-    if gender.lower().startswith("m"): gender = "Male"
-    elif gender.lower().startswith("f"): gender = "Female"
-    else: gender = "Non-binary/Other"
+    raw_gender = data.get("gender")
+    if raw_gender in (None, ""):
+        gender = random.choice(("Male", "Female"))
+    else:
+        gender = _GENDER_BY_INITIAL.get(str(raw_gender).strip()[:1].lower(), "Non-binary/Other")
 
     age = _get("age", random.randint(18, 55))
     try:
@@ -219,11 +370,7 @@ def _normalize_persona(data: Dict[str, Any], fallback_name: Optional[str] = None
         personality_desc = description
         
         # 生成情绪画像
-        emotion = EmotionGenerator.generate_from_context(
-            f"Initial mood: {mood_str}, Personality: {personality_desc}",
-            {"description": personality_desc}
-        )
-        init_state["emotion"] = emotion.to_dict()
+        init_state["emotion"] = _initial_emotion(str(mood_str), str(personality_desc))
 
     return {
         "id": f"agent_{uuid.uuid4().hex}",
@@ -246,58 +393,90 @@ def _bootstrap_personas(n: int, constraints: Dict[str, Any], env_spec: Dict[str,
     role_mix = constraints.get("role_mix") or {}
     locs = constraints.get("locations") or _infer_locations_from_env(env_spec)
 
-    def _sample_age() -> int:
-        bucket = _weighted_choice(age_buckets, "26-40")
-        lo, hi = bucket.split("-")
-        return random.randint(int(lo), int(hi))
+    if n <= 0:
+        return res
+    # Draw every field as a whole column; seeded from `random` so random.seed() still reproduces runs
+    rng = np.random.default_rng(random.getrandbits(64))
+
+    def _uniform(values: List[str]) -> List[str]:
+        return [values[i] for i in rng.integers(len(values), size=n).tolist()]
+
+    def _weighted(d: Dict[str, Any], fallback: List[str]) -> List[str]:
+        table = _alias_table(tuple(d.items())) if d else None
+        if table is None:
+            return _uniform(fallback)
+        keys, prob, alias = table
+        i = rng.integers(len(keys), size=n)
+        pick = np.where(rng.random(n) < np.asarray(prob)[i], i, np.asarray(alias)[i])
+        return [keys[j] for j in pick.tolist()]
 
     default_roles = ["High school student","Teacher","Administrator","Security staff","Cleaner","Cafeteria worker","Volunteer","Retail clerk","Passenger"]
-    for _ in range(n):
-        g = _weighted_choice(gender_ratio, "Male")
-        role = _weighted_choice(role_mix, random.choice(default_roles))
-        nm = _sample_en_name(g)
+    genders = _weighted(gender_ratio, ["Male"])
+    roles = _weighted(role_mix, default_roles)
+    buckets = _weighted(age_buckets, ["26-40"])
+    bounds = {b: tuple(int(x) for x in b.split("-")) for b in set(buckets)}
+    lo = np.array([bounds[b][0] for b in buckets])
+    hi = np.array([bounds[b][1] for b in buckets])
+    ages = rng.integers(lo, hi + 1).tolist()
+    incomes = _uniform(INCOME_OPTIONS)
+    educations = _uniform(EDU_OPTIONS[1:])
+    locations = _uniform(locs) if locs else ["Start"] * n
+    moods = _uniform(["calm", "neutral", "curious"])
+
+    names = _sample_en_names(genders)
+
+    for nm, g, role, age, income, edu, loc, mood in zip(names, genders, roles, ages, incomes, educations, locations, moods):
+        description = f"{role}; ordinary resident; cooperative."
         res.append({
             "id": f"agent_{uuid.uuid4().hex}",
             "name": nm,
             "gender": g,
-            "age": _sample_age(),
+            "age": age,
             "occupation": role,
-            "income_level": random.choice(INCOME_OPTIONS),
-            "education": random.choice(EDU_OPTIONS[1:]),
-            "description": f"{role}; ordinary resident; cooperative.",
+            "income_level": income,
+            "education": edu,
+            "description": description,
             "initial_memory": ["Follows rules", "Seeks social acceptance", "Watches authority signals"],
-            "initial_state": _generate_initial_state_with_emotion(random.choice(locs) if locs else "Start", random.choice(["calm","neutral","curious"]), f"{role}; ordinary resident; cooperative."),
+            "initial_state": _generate_initial_state_with_emotion(loc, mood, description),
         })
     return res
 
-def _generate_initial_state_with_emotion(location: str, mood: str, personality: str) -> Dict[str, Any]:
-    """生成包含情绪画像的初始状态"""
+@lru_cache(maxsize=256)
+def _emotion_proto(mood: str, personality: str) -> Tuple[Tuple[str, Any], ...]:
+    """Emotion dict items for a (mood, personality) pair; generation is deterministic apart from the timestamp."""
     emotion = EmotionGenerator.generate_from_context(
         f"Initial mood: {mood}, Personality: {personality}",
         {"description": personality}
     )
-    
+    return tuple(emotion.to_dict().items())
+
+def _initial_emotion(mood: str, personality: str) -> Dict[str, Any]:
+    """Fresh copy of the cached emotion prototype, stamped with the current time."""
+    data = dict(_emotion_proto(mood, personality))
+    data["timestamp"] = time()
+    return data
+
+def _generate_initial_state_with_emotion(location: str, mood: str, personality: str) -> Dict[str, Any]:
+    """生成包含情绪画像的初始状态"""
     return {
         "location": location,
         "mood": mood,
-        "emotion": emotion.to_dict()
+        "emotion": _initial_emotion(mood, personality)
     }
 
+# (name, lowercased name) pairs, lowercased once at import
+_LOCATION_CANDIDATES: Tuple[Tuple[str, str], ...] = tuple((w, w.lower()) for w in (
+    "Classroom","Hallway","Cafeteria","Gym","Playground","Dorm","Administration building","School gate",
+    "Auditorium","Library","Stairwell","Lobby","Registration desk","Pharmacy","ER","Imaging","Lab",
+    "Concourse","Security checkpoint","Platform","Inside train"
+))
+_DEFAULT_LOCATIONS: Tuple[str, ...] = ("Classroom","Hallway","Cafeteria","Library","Gym","Auditorium","School gate","Courtyard")
+
 def _infer_locations_from_env(env_spec: Dict[str, Any]) -> List[str]:
-    txt = (env_spec.get("prompt") or "") + " " + " ".join(env_spec.get("rules") or [])
-    candidates = [w for w in [
-        "Classroom","Hallway","Cafeteria","Gym","Playground","Dorm","Administration building","School gate",
-        "Auditorium","Library","Stairwell","Lobby","Registration desk","Pharmacy","ER","Imaging","Lab",
-        "Concourse","Security checkpoint","Platform","Inside train"
-    ] if w.lower() in txt.lower()]
-    if not candidates:
-        candidates = ["Classroom","Hallway","Cafeteria","Library","Gym","Auditorium","School gate","Courtyard"]
-    # de-dup & trim
-    seen, out = set(), []
-    for c in candidates:
-        if c not in seen:
-            out.append(c); seen.add(c)
-    return out[:12]
+    txt_l = ((env_spec.get("prompt") or "") + " " + " ".join(env_spec.get("rules") or [])).lower()
+    # Both candidate tuples are already unique, so no de-dup pass is needed
+    candidates = [w for w, wl in _LOCATION_CANDIDATES if wl in txt_l] or list(_DEFAULT_LOCATIONS)
+    return candidates[:12]
 
 def _rebalance_and_fix(personas: List[Dict[str, Any]], count: int, constraints: Dict[str, Any], env_title: str) -> List[Dict[str, Any]]:
     if not personas:
@@ -310,11 +489,15 @@ def _rebalance_and_fix(personas: List[Dict[str, Any]], count: int, constraints:
 
     # Unique English names
     names_seen = set()
-    for p in personas:
+    renamed: List[int] = []
+    for i, p in enumerate(personas):
         name = p.get("name") or ""
         if (not name) or (name in names_seen) or (" " not in name):
-            p["name"] = _sample_en_name(p.get("gender"))
-        names_seen.add(p["name"])
+            renamed.append(i)
+        else:
+            names_seen.add(name)
+    for i, nm in zip(renamed, _sample_en_names([personas[i].get("gender") for i in renamed])):
+        personas[i]["name"] = nm
 
     # Gender re-balance (approx)
     target_counts = {g: int(round(r * count)) for g, r in gender_ratio.items()}
@@ -326,23 +509,24 @@ def _rebalance_and_fix(personas: List[Dict[str, Any]], count: int, constraints:
             target_counts[k] += 1 if diff > 0 else -1
             diff += -1 if diff > 0 else 1
 
-    def current_gender_hist():
-        h: Dict[str, int] = {}
-        for p in personas: h[p["gender"]] = h.get(p["gender"], 0) + 1
-        return h
-
-    hist = current_gender_hist()
-    if hist:
-        for g, tgt in target_counts.items():
-            cur = hist.get(g, 0)
-            if cur < tgt:
-                over_g = max(hist, key=lambda x: hist.get(x, 0))
-                need = tgt - cur
-                idxs = [i for i, p in enumerate(personas) if p["gender"] == over_g][:need]
-                for i in idxs:
-                    personas[i]["gender"] = g
-                    personas[i]["name"] = _sample_en_name(g)
-                hist = current_gender_hist()
+    # gender -> ascending indices of personas with that gender, kept up to date as personas are moved
+    gender_idx: Dict[str, List[int]] = {}
+    for i, p in enumerate(personas):
+        gender_idx.setdefault(p["gender"], []).append(i)
+
+    for g, tgt in target_counts.items():
+        cur = len(gender_idx.get(g, ()))
+        if cur < tgt:
+            # Largest group donates; ties go to the gender that appears first in the list
+            over_g = min((x for x in gender_idx if gender_idx[x]),
+                         key=lambda x: (-len(gender_idx[x]), gender_idx[x][0]))
+            need = tgt - cur
+            idxs = gender_idx[over_g][:need]
+            del gender_idx[over_g][:need]
+            for i, nm in zip(idxs, _sample_en_names([g] * len(idxs))):
+                personas[i]["gender"] = g
+                personas[i]["name"] = nm
+            gender_idx[g] = sorted(gender_idx.get(g, []) + idxs)
 
     # Role balancing if provided
     if role_mix:
@@ -354,17 +538,19 @@ def _rebalance_and_fix(personas: List[Dict[str, Any]], count: int, constraints:
                 if diff == 0: break
                 tgt_role_counts[k] += 1 if diff > 0 else -1
                 diff += -1 if diff > 0 else 1
-        cur_role: Dict[str, int] = {}
-        for p in personas:
-            cur_role[p["occupation"]] = cur_role.get(p["occupation"], 0) + 1
-        def indices_of(role): return [i for i, p in enumerate(personas) if p["occupation"] == role]
+        # role -> ascending indices, built in one pass; over- and under-filled roles are disjoint,
+        # so moving personas into under-filled roles never invalidates a list that is still to be read
+        role_idx: Dict[str, List[int]] = {}
+        for i, p in enumerate(personas):
+            role_idx.setdefault(p["occupation"], []).append(i)
+        cur_role = {r: len(ix) for r, ix in role_idx.items()}
         over = [(r, cur_role.get(r, 0) - tgt) for r, tgt in tgt_role_counts.items() if cur_role.get(r, 0) > tgt]
         under = [(r, tgt_role_counts[r] - cur_role.get(r, 0)) for r in tgt_role_counts if cur_role.get(r, 0) < tgt_role_counts[r]]
         over.sort(key=lambda x: x[1], reverse=True)
         under.sort(key=lambda x: x[1], reverse=True)
         for r_over, extra in over:
             if extra <= 0: continue
-            sel = indices_of(r_over)[:extra]
+            sel = role_idx.get(r_over, [])[:extra]
             for r_under, need in list(under):
                 while need > 0 and sel:
                     idx = sel.pop()
@@ -1,7 +1,13 @@
 import os
-import json
 from typing import Any, Dict, List, Optional, Callable
 
+from . import jsonio
+
+try:
+    import zstandard
+except ImportError:  # zstandard 为可选依赖，仅 .zst 路径需要
+    zstandard = None
+
 # 模块级可变 agents.json 路径（默认全局）
 _AGENTS_PATH: str = os.getenv("AGENTS_JSON_PATH", "prompt/agents.json")
 
@@ -10,30 +16,55 @@ def set_agents_path(path: str) -> None:
     global _AGENTS_PATH
     _AGENTS_PATH = path
 
+def get_agents_path() -> str:
+    """返回当前进程使用的 agents.json 路径。"""
+    return _AGENTS_PATH
+
 def _ensure_dir_for(path: str) -> None:
     d = os.path.dirname(path)
     if d and not os.path.exists(d):
         os.makedirs(d, exist_ok=True)
 
-def load_agents() -> List[Dict[str, Any]]:
-    if not os.path.exists(_AGENTS_PATH):
+def _zstd(path: str):
+    """以 .zst 结尾的路径按 zstd 压缩存取"""
+    if zstandard is None:
+        raise RuntimeError(f"{path} 为 zstd 压缩文件，需要安装 zstandard")
+    return zstandard
+
+def load_agents(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    path = path or _AGENTS_PATH
+    if not os.path.exists(path):
         return []
-    with open(_AGENTS_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    with open(path, "rb") as f:
+        raw = f.read()
+    if path.endswith(".zst"):
+        raw = _zstd(path).ZstdDecompressor().decompress(raw)
+    data = jsonio.loads(raw)
     if not isinstance(data, list):
-        raise ValueError(f"{_AGENTS_PATH} 内容应为数组")
+        raise ValueError(f"{path} 内容应为数组")
     return data
 
-def save_agents(items: List[Dict[str, Any]]) -> None:
-    _ensure_dir_for(_AGENTS_PATH)
-    with open(_AGENTS_PATH, "w", encoding="utf-8") as f:
-        json.dump(items, f, ensure_ascii=False, indent=2)
+def save_agents(items: List[Dict[str, Any]], path: Optional[str] = None) -> None:
+    """先写临时文件并 fsync，再原子替换，写入中途崩溃不会留下半个 agents.json"""
+    path = path or _AGENTS_PATH
+    _ensure_dir_for(path)
+    if path.endswith(".zst"):
+        payload = _zstd(path).ZstdCompressor(level=3).compress(jsonio.dumps_bytes(items))
+    else:
+        payload = jsonio.dumps_bytes(items, indent=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def _index_by_name(items: List[Dict[str, Any]]) -> Dict[Any, int]:
+    """name→下标 索引；倒序构建使同名时保留第一条"""
+    return {items[i].get("name"): i for i in range(len(items) - 1, -1, -1)}
 
 def find_by_name(items: List[Dict[str, Any]], name: str) -> Optional[Dict[str, Any]]:
-    for it in items:
-        if it.get("name") == name:
-            return it
-    return None
+    return next((it for it in items if it.get("name") == name), None)
 
 def add_agent(persona: Dict[str, Any]) -> None:
     items = load_agents()
@@ -42,15 +73,11 @@ def add_agent(persona: Dict[str, Any]) -> None:
 
 def upsert_agent(persona: Dict[str, Any]) -> None:
     items = load_agents()
-    name = persona.get("name")
-    found = False
-    for i, it in enumerate(items):
-        if it.get("name") == name:
-            items[i] = persona
-            found = True
-            break
-    if not found:
+    i = _index_by_name(items).get(persona.get("name"))
+    if i is None:
         items.append(persona)
+    else:
+        items[i] = persona
     save_agents(items)
 
 def remove_agent(name: str) -> bool:
@@ -0,0 +1,132 @@
+"""
+agents.json 进程内写回缓存
+- load_agents：按当前 agents.json 路径缓存，命中时不再读盘
+- save_agents：只更新缓存并标记 dirty，短延迟后合并落盘（连续写入只触发一次）
+- find_by_name：基于缓存的 name→下标 索引，O(1) 查找；整表替换或删除会使索引失效
+- add_agent / upsert_agent：就地修改缓存并同步维护索引，O(1)；remove_agent 为 O(N)
+- flush_all：立即写出所有 dirty 条目（模块导入时已注册为 atexit 回调）
+"""
+
+import atexit
+import threading
+from typing import Any, Dict, List, Optional
+
+from . import registry
+
+# 写入合并窗口（秒）：窗口内的多次 save 只落盘一次
+_FLUSH_DELAY: float = 0.1
+
+# {agents_path: {"data": [...], "by_name": Optional[Dict[str, int]], "dirty": bool, "timer": Optional[threading.Timer]}}
+_CACHE: Dict[str, Dict[str, Any]] = {}
+_LOCK = threading.RLock()
+
+
+def _entry(path: str) -> Dict[str, Any]:
+    ent = _CACHE.get(path)
+    if ent is None:
+        ent = {"data": registry.load_agents(path), "by_name": None, "dirty": False, "timer": None}
+        _CACHE[path] = ent
+    return ent
+
+
+def _flush(path: str) -> None:
+    with _LOCK:
+        ent = _CACHE.get(path)
+        if not ent or not ent["dirty"]:
+            return
+        registry.save_agents(ent["data"], path)
+        ent["dirty"] = False
+        ent["timer"] = None
+
+
+def load_agents() -> List[Dict[str, Any]]:
+    """读取当前路径下的 agents（命中缓存时不读盘）。"""
+    with _LOCK:
+        return _entry(registry.get_agents_path())["data"]
+
+
+def _mark_dirty(path: str, ent: Dict[str, Any]) -> None:
+    """标记 dirty 并（重新）安排延迟落盘；调用方需持有 _LOCK"""
+    ent["dirty"] = True
+    if ent["timer"] is not None:
+        ent["timer"].cancel()
+    timer = threading.Timer(_FLUSH_DELAY, _flush, args=(path,))
+    timer.daemon = True
+    ent["timer"] = timer
+    timer.start()
+
+
+def save_agents(items: List[Dict[str, Any]]) -> None:
+    """整表写入缓存并安排延迟落盘。"""
+    path = registry.get_agents_path()
+    with _LOCK:
+        ent = _entry(path)
+        ent["data"] = items
+        ent["by_name"] = None
+        _mark_dirty(path, ent)
+
+
+def _name_index(ent: Dict[str, Any]) -> Dict[str, int]:
+    """惰性构建 name→下标 索引；同名时保留第一条，与 registry.find_by_name 一致"""
+    if ent["by_name"] is None:
+        ent["by_name"] = registry._index_by_name(ent["data"])
+    return ent["by_name"]
+
+
+def find_by_name(name: str) -> Optional[Dict[str, Any]]:
+    with _LOCK:
+        ent = _entry(registry.get_agents_path())
+        i = _name_index(ent).get(name)
+        return ent["data"][i] if i is not None else None
+
+
+def _append(ent: Dict[str, Any], persona: Dict[str, Any]) -> None:
+    """追加到缓存列表；索引已建立时同步登记（同名保留第一条）"""
+    items = ent["data"]
+    items.append(persona)
+    if ent["by_name"] is not None:
+        ent["by_name"].setdefault(persona.get("name"), len(items) - 1)
+
+
+def add_agent(persona: Dict[str, Any]) -> None:
+    path = registry.get_agents_path()
+    with _LOCK:
+        ent = _entry(path)
+        _append(ent, persona)
+        _mark_dirty(path, ent)
+
+
+def upsert_agent(persona: Dict[str, Any]) -> None:
+    path = registry.get_agents_path()
+    with _LOCK:
+        ent = _entry(path)
+        i = _name_index(ent).get(persona.get("name"))
+        if i is None:
+            _append(ent, persona)
+        else:
+            ent["data"][i] = persona
+        _mark_dirty(path, ent)
+
+
+def remove_agent(name: str) -> bool:
+    with _LOCK:
+        items = load_agents()
+        kept = [it for it in items if it.get("name") != name]
+        if len(kept) == len(items):
+            return False
+        save_agents(kept)
+        return True
+
+
+def flush_all() -> None:
+    """取消所有待定计时器并立即写出 dirty 条目。"""
+    with _LOCK:
+        for path, ent in _CACHE.items():
+            if ent["timer"] is not None:
+                ent["timer"].cancel()
+                ent["timer"] = None
+            if ent["dirty"]:
+                _flush(path)
+
+
+atexit.register(flush_all)
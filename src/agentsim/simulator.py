@@ -1,10 +1,12 @@
 import asyncio
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
 
 from .llm import chat_json
 from .models import AgentPersona, EnvSpec, SimulationConfig, AgentTickOutput, extract_emotion_from_state, ensure_emotion_in_state
-from .logger import append_agent_log, append_event_log
+from .logger import append_agent_log, append_agent_logs_batch, append_event_log, flush_all
 from .world import group_by_location, make_local_context
 from .interaction import simulate_group_interaction
 from .relations import (
@@ -97,6 +99,7 @@ async def simulate_step_for_agent(
             }],
             temperature=config.temperature,
             max_tokens=config.max_tokens,
+            json_object=True,
         )
     except Exception as e:
         # Fallback without LLM to keep the simulation progressing
@@ -148,9 +151,7 @@ async def simulate_step_for_agent(
     new_state = data.get("state") or {}
     new_state = ensure_emotion_in_state(new_state, {"description": agent.description})
     # 仅当计算出的情绪具备有效强度时覆盖，避免写入全0情绪
-    if current_emotion and (abs(current_emotion.intensity) > 1e-6 or any(abs(getattr(current_emotion, k, 0.0)) > 1e-6 for k in [
-        "valence","arousal","dominance","joy","sadness","anger","fear","surprise","disgust","trust","anticipation","optimism","anxiety","guilt","pride","shame","envy","gratitude","hope"
-    ])):
+    if current_emotion and (abs(current_emotion.intensity) > 1e-6 or bool((np.abs(current_emotion.vec) > 1e-6).any())):
         new_state["emotion"] = current_emotion.to_dict()
     else:
         # 退化为平静基线，避免全0
@@ -165,17 +166,7 @@ async def simulate_step_for_agent(
     except Exception:
         pass
 
-    out = AgentTickOutput(
-        agent_id=agent.id,
-        tick=tick,
-        action=str(data.get("action", "")).strip(),
-        speech=str(data.get("speech", "")).strip(),
-        state=new_state,
-        thoughts=str(data.get("thoughts", "")).strip(),
-        location=str(data.get("location", "") or last_location),
-        memory=list(data.get("memory") or []),
-        emotion=current_emotion,
-    )
+    out = AgentTickOutput.from_llm_dict(agent.id, tick, data, new_state, last_location, current_emotion)
 
     append_agent_log(agent.name, {
         "type": "tick.intent",
@@ -214,17 +205,20 @@ async def run_tick_with_interactions(
     groups = group_by_location(temp_history)
     # a location may produce multiple chunked interaction results
     group_results: Dict[str, List[Dict[str, Any]]] = {}
+    # (location, chunk_index, participants) for every chunk; all chunk LLM calls run concurrently
+    jobs: List[Any] = []
+    coros = []
 
     for location, participants in groups.items():
         ids_here = [p.agent_id for p in participants]
         rel_summary = local_relation_summary(G, ids_here)
         allowed_speakers_all = pick_speakers_hard(G, ids_here, alpha=config.relation_influence, base_k=min(3, len(ids_here)))
-        pairs_all: List[List[str]] = []
+        pairs_all: List[Tuple[str, str]] = []
         for i, u in enumerate(ids_here):
             for v in ids_here[i+1:]:
                 rec = G.get(u, {}).get(v)
                 if rec and pair_trust_weight(rec) >= 0.55 * config.relation_influence:
-                    pairs_all.append([u, v])
+                    pairs_all.append((u, v))
         local_visible = make_local_context(tick, history, focus_agent_id="", focus_location=location)
 
         # Chunk to avoid oversized JSON from LLM (reduce truncation/parse errors)
@@ -233,64 +227,76 @@ async def run_tick_with_interactions(
         group_results[location] = []
 
         for chunk_index, part_chunk in enumerate(chunks):
-            chunk_ids = [p.agent_id for p in part_chunk]
+            chunk_ids = {p.agent_id for p in part_chunk}
             allowed_speakers = [aid for aid in allowed_speakers_all if aid in chunk_ids]
-            pairs = [pair for pair in pairs_all if pair[0] in chunk_ids and pair[1] in chunk_ids]
-
-            try:
-                data = await simulate_group_interaction(
-                    env=env,
-                    location=location,
-                    tick=tick,
-                    local_visible=local_visible,
-                    participants=part_chunk,
-                    relations_summary=rel_summary,
-                    allowed_speakers=allowed_speakers,
-                    allowed_pairs=pairs,
-                    temperature=config.temperature,
-                    max_tokens=max(config.max_tokens, 800),  # Ensure minimum 800 for group interactions
-                )
-            except Exception as e:
-                # Group interaction fallback for this chunk
-                data = {
-                    "location": location,
-                    "tick": tick,
-                    "notes": f"Group fallback due to LLM error: {str(e)[:120]}",
-                    "agents": [
-                        {
-                            "agent_id": p.agent_id,
-                            "action": "idle",
-                            "speech": "",
-                            "state": {},
-                            "thoughts": "",
-                            "location": p.location,
-                            "memory": [],
-                        }
-                        for p in part_chunk
-                    ],
-                }
-                for p in part_chunk:
-                    append_agent_log(id_to_name.get(p.agent_id, p.agent_id), {
-                        "type": "group.fallback",
-                        "tick": tick,
-                        "location": location,
-                        "reason": "llm_error",
-                        "error": str(e),
-                    })
-
-            group_results[location].append(data)
-
-            note = data.get("notes")
-            append_event_log({
-                "type": "encounter",
-                "tick": tick,
+            pairs = tuple(pair for pair in pairs_all if pair[0] in chunk_ids and pair[1] in chunk_ids)
+
+            jobs.append((location, chunk_index, part_chunk))
+            coros.append(simulate_group_interaction(
+                env=env,
+                location=location,
+                tick=tick,
+                local_visible=local_visible,
+                participants=part_chunk,
+                relations_summary=rel_summary,
+                allowed_speakers=allowed_speakers,
+                allowed_pairs=pairs,
+                temperature=config.temperature,
+                max_tokens=max(config.max_tokens, 800),  # Ensure minimum 800 for group interactions
+            ))
+
+    # Concurrency is bounded by the LLM semaphore; results come back in job order
+    results = await asyncio.gather(*coros, return_exceptions=True)
+
+    for (location, chunk_index, part_chunk), data in zip(jobs, results):
+        chunk_ids = [p.agent_id for p in part_chunk]
+        if isinstance(data, BaseException):
+            if not isinstance(data, Exception):
+                raise data
+            e = data
+            # Group interaction fallback for this chunk
+            data = {
                 "location": location,
-                "notes": note or "",
-                "participants": chunk_ids,
-                "chunk": chunk_index,
-            })
+                "tick": tick,
+                "notes": f"Group fallback due to LLM error: {str(e)[:120]}",
+                "agents": [
+                    {
+                        "agent_id": p.agent_id,
+                        "action": "idle",
+                        "speech": "",
+                        "state": {},
+                        "thoughts": "",
+                        "location": p.location,
+                        "memory": [],
+                    }
+                    for p in part_chunk
+                ],
+            }
+            append_agent_logs_batch([
+                (id_to_name.get(p.agent_id, p.agent_id), {
+                    "type": "group.fallback",
+                    "tick": tick,
+                    "location": location,
+                    "reason": "llm_error",
+                    "error": str(e),
+                })
+                for p in part_chunk
+            ])
+
+        group_results[location].append(data)
+
+        note = data.get("notes")
+        append_event_log({
+            "type": "encounter",
+            "tick": tick,
+            "location": location,
+            "notes": note or "",
+            "participants": chunk_ids,
+            "chunk": chunk_index,
+        })
 
     final_outputs: Dict[str, AgentTickOutput] = {o.agent_id: o for o in intents}
+    final_logs: List[Tuple[str, Dict[str, Any]]] = []
     for location, data_list in group_results.items():
         for data in data_list:
             for item in data.get("agents", []):
@@ -315,7 +321,7 @@ async def run_tick_with_interactions(
                     except Exception:
                         pass
 
-                append_agent_log(id_to_name.get(aid, aid), {
+                final_logs.append((id_to_name.get(aid, aid), {
                     "type": "tick.final",
                     "tick": tick,
                     "location": base.location,
@@ -325,6 +331,9 @@ async def run_tick_with_interactions(
                     "thoughts": base.thoughts,
                     "memory": base.memory,
                     "emotion": base.emotion.to_dict() if base.emotion else None,
-                })
+                }))
 
+    append_agent_logs_batch(final_logs)
+    # tick 边界：把本 tick 缓冲的日志写出，外部读取方总能看到完整的 tick
+    flush_all()
     return list(final_outputs.values())
@@ -19,12 +19,18 @@ from dotenv import load_dotenv
 from src.experiments.manager import create_experiment
 from src.agentsim.models import AgentPersona, EnvSpec, SimulationConfig, AgentTickOutput
 from src.agentsim.simulator import run_tick_with_interactions
-from src.agentsim.logger import set_exp_log_roots, append_agent_log
+from src.agentsim.logger import set_exp_log_roots, append_agent_logs_batch, read_log, read_last_log
 from src.agentsim.registry import set_agents_path
+from src.agentsim.llm import close_llm_client
 
 load_dotenv()
 
+# agent 日志文件扩展名（logger 按 AGENTSIM_LOG_FORMAT 写 JSONL 或 msgpack）
+_LOG_EXTS = (".jsonl", ".msgpack")
+
 app = FastAPI(title="AgentSociety API", version="1.0.0")
+# 服务关闭时释放 LLM 客户端的 keep-alive 连接池
+app.add_event_handler("shutdown", close_llm_client)
 
 # 添加CORS支持
 app.add_middleware(
@@ -209,16 +215,13 @@ async def get_experiment_logs(exp_slug: str, agent_name: Optional[str] = None, l
     
     try:
         if agent_name:
-            # 获取特定agent的日志
-            log_file = os.path.join(logs_dir, f"{agent_name}.jsonl")
-            if not os.path.exists(log_file):
+            # 获取特定agent的日志（JSONL 或 msgpack 格式）
+            candidates = [os.path.join(logs_dir, f"{agent_name}{ext}") for ext in _LOG_EXTS]
+            log_file = next((p for p in candidates if os.path.exists(p)), None)
+            if log_file is None:
                 return {"logs": []}
             
-            logs = []
-            with open(log_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.strip():
-                        logs.append(json.loads(line))
+            logs = list(read_log(log_file))
             
             # 限制返回数量
             return {"logs": logs[-limit:] if len(logs) > limit else logs}
@@ -226,17 +229,12 @@ async def get_experiment_logs(exp_slug: str, agent_name: Optional[str] = None, l
             # 获取所有agent的最新日志
             all_logs = []
             for log_file in os.listdir(logs_dir):
-                if log_file.endswith(".jsonl"):
-                    file_path = os.path.join(logs_dir, log_file)
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        lines = f.readlines()
-                        if lines:
-                            # 只取最后一条
-                            last_line = lines[-1].strip()
-                            if last_line:
-                                log_entry = json.loads(last_line)
-                                log_entry["agent_file"] = log_file
-                                all_logs.append(log_entry)
+                if log_file.endswith(_LOG_EXTS):
+                    # 只取最后一条（从文件末尾读取，不解码前面的记录）
+                    log_entry = read_last_log(os.path.join(logs_dir, log_file))
+                    if log_entry is not None:
+                        log_entry["agent_file"] = log_file
+                        all_logs.append(log_entry)
             
             return {"logs": all_logs}
     except Exception as e:
@@ -365,8 +363,8 @@ async def run_simulation_background(
         }
         
         # 记录元信息
-        for a in agents:
-            append_agent_log(a.name, {
+        append_agent_logs_batch([
+            (a.name, {
                 "type": "sim_meta",
                 "title": env_spec.title,
                 "with_interactions": True,
@@ -376,6 +374,8 @@ async def run_simulation_background(
                 "visibility": "local",
                 "relation_influence": relation_influence,
             })
+            for a in agents
+        ])
         
         history: Dict[str, List[AgentTickOutput]] = {a.id: [] for a in agents}
         tick = 0
@@ -5,8 +5,9 @@ from dotenv import load_dotenv
 from src.agentsim.models import AgentPersona, EnvSpec, SimulationConfig, AgentTickOutput
 from src.agentsim.environment import generate_env_from_hint, merge_env
 from src.agentsim.simulator import run_tick_with_interactions
-from src.agentsim.logger import append_agent_log, set_exp_log_roots
+from src.agentsim.logger import append_agent_logs_batch, set_exp_log_roots
 from src.agentsim.registry import set_agents_path
+from src.agentsim.llm import run_with_llm
 
 load_dotenv()
 
@@ -63,13 +64,15 @@ async def main_async():
     )
 
     id2name = {a.id: a.name for a in agents}
-    for a in agents:
-        append_agent_log(a.name, {
+    append_agent_logs_batch([
+        (a.name, {
             "type":"sim_meta","title":env_spec.title,"with_interactions":True,
             "interval_sec":args.interval,"temperature":args.temperature,
             "max_tokens":args.max_tokens,"visibility":args.visibility,
             "relation_influence":relation_influence,
         })
+        for a in agents
+    ])
 
     history: Dict[str, List[AgentTickOutput]] = {a.id: [] for a in agents}
 
@@ -92,4 +95,4 @@ async def main_async():
         print(f"\n仿真异常终止：{e}")
 
 if __name__ == "__main__":
-    asyncio.run(main_async())
+    run_with_llm(main_async())
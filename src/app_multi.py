@@ -1,5 +1,4 @@
 import argparse
-import asyncio
 import json
 import os
 from typing import Any, Dict, List
@@ -9,6 +8,7 @@ from dotenv import load_dotenv
 from src.agentsim.models import AgentPersona, EnvSpec, SimulationConfig, SimulationInput
 from src.agentsim.environment import generate_env_from_hint, merge_env
 from src.agentsim.simulator import run_simulation
+from src.agentsim.llm import run_with_llm
 
 load_dotenv()
 
@@ -100,4 +100,4 @@ async def main_async():
 
 
 if __name__ == "__main__":
-    asyncio.run(main_async())
+    run_with_llm(main_async())
@@ -1,11 +1,11 @@
 import argparse
-import asyncio
 import json
 import os
 from typing import Any, Dict, Optional
 
 from dotenv import load_dotenv
 from src.experiments.manager import create_experiment
+from src.agentsim.llm import run_with_llm
 
 load_dotenv()
 
@@ -48,4 +48,4 @@ async def main_async():
         print("包含：env.json, constraints.json, agents.json（总名单）, meta.json, logs/agents/（按人日志）")
 
 if __name__ == "__main__":
-    asyncio.run(main_async())
+    run_with_llm(main_async())